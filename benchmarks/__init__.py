@@ -0,0 +1 @@
+"""Benchmarks for database and bot performance."""
@@ -0,0 +1,75 @@
+"""Measure database throughput of the bot queries at different pool sizes.
+
+Runs concurrent workers against the configured Postgres database, each
+repeating the reads done on every swipe (registration check and a batch of
+feed cards), and prints queries per second and latency percentiles for
+every pool size.
+
+Usage:
+    poetry run python -m benchmarks.pool_throughput --pool-sizes 5 10 20 40 --workers 100
+"""
+import argparse
+import asyncio
+import dataclasses
+import statistics
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.configuration import conf
+from src.db.database import Database, create_async_engine
+
+
+async def worker(sessionmaker: async_sessionmaker, user_id: int, deadline: float, latencies: list[float]) -> None:
+    """Repeat swipe reads until the deadline."""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        async with sessionmaker() as session:
+            db = Database(session)
+            await db.user.user_register_check(user_id)
+            await db.dream.get_dream_cards_after(user_id, limit=conf.feed.batch_size)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(engine: AsyncEngine, workers: int, duration: float) -> list[float]:
+    """Run workers for ``duration`` seconds and collect latencies."""
+    sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(worker(sessionmaker, n, deadline, latencies) for n in range(workers)))
+    return latencies
+
+
+async def main(pool_sizes: list[int], workers: int, duration: float, health_check: bool) -> None:
+    """Benchmark every pool size."""
+    print(f"{'pool':>6} {'swipes/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for pool_size in pool_sizes:
+        config = dataclasses.replace(
+            conf.db,
+            pool_size=pool_size,
+            max_overflow=0,
+            health_check_interval=30 if health_check else 0,
+        )
+        engine = create_async_engine(conf.db.build_connection_str(), config)
+
+        # Прогреваем пул, чтобы не мерить открытие соединений
+        await run(engine, pool_size, 1)
+        latencies = await run(engine, workers, duration)
+        await engine.dispose()
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{pool_size:>6} {len(latencies) / duration:>10.1f} "
+            f"{quantiles[49] * 1000:>8.1f} {quantiles[94] * 1000:>8.1f} {quantiles[98] * 1000:>8.1f}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[5, 10, 20, 40])
+    parser.add_argument('--workers', type=int, default=100, help='Concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per pool size')
+    parser.add_argument('--health-check', action='store_true', help='Use periodic health check instead of pre-ping')
+    args = parser.parse_args()
+
+    asyncio.run(main(args.pool_sizes, args.workers, args.duration, args.health_check))
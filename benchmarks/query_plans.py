@@ -0,0 +1,156 @@
+"""Show query plans of the hot repository queries before and after indexes.
+
+Seeds a dataset into the configured Postgres database, prints
+``EXPLAIN (ANALYZE, BUFFERS)`` of the queries behind ``DreamRepo``,
+``AchievementsRepository.is_achievement_unlocked`` and
+``ProgressRepository.get_user_progress`` without and with the indexes from
+the ``add hot path indexes`` migration. Everything runs in one transaction
+which is rolled back, so the database is left as it was.
+
+Usage:
+    poetry run python -m benchmarks.query_plans --users 20000 --dreams 200000
+"""
+import argparse
+import asyncio
+import re
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.schema import CreateIndex
+
+from src.configuration import conf
+from src.db.models import Dream, DreamMedia, User, UserAchievement, UserProgress
+
+INDEXES = [
+    index
+    for table in (Dream.__table__, UserAchievement.__table__)
+    for index in table.indexes
+    if index.name in ('ix_dream_user_id', 'ix_user_achievements_user_id_achievement_id')
+]
+
+# Идентификаторы пользователей выше реальных Telegram id, чтобы не пересекаться с данными
+USER_ID_BASE = 10 ** 12
+
+
+async def seed(conn: AsyncConnection, users: int, dreams: int, achievements: int) -> None:
+    """Fill tables with generated rows."""
+    await conn.execute(
+        text(
+            """
+            INSERT INTO "user" (user_id, user_name, name, gender, country, role)
+            SELECT :base + n, 'user' || n, 'User ' || n,
+                   CASE WHEN n % 2 = 0 THEN 'Мужчина' ELSE 'Женщина' END, 'City ' || n % 50, 'USER'
+            FROM generate_series(1, :users) AS n
+            """
+        ),
+        {'base': USER_ID_BASE, 'users': users},
+    )
+    await conn.execute(
+        text(
+            """
+            INSERT INTO dream (user_id, username, name, description, category)
+            SELECT :base + 1 + n % :users, 'user' || n % :users, 'Dream ' || n, repeat('x', 200), 'Category ' || n % 10
+            FROM generate_series(1, :dreams) AS n
+            """
+        ),
+        {'base': USER_ID_BASE, 'users': users, 'dreams': dreams},
+    )
+    await conn.execute(
+        text(
+            """
+            INSERT INTO user_achievements (user_id, achievement_id, points_earned)
+            SELECT :base + u, 'achievement_' || a, 10
+            FROM generate_series(1, :users) AS u, generate_series(1, :achievements) AS a
+            """
+        ),
+        {'base': USER_ID_BASE, 'users': users, 'achievements': achievements},
+    )
+    await conn.execute(
+        text(
+            """
+            INSERT INTO user_progress (user_id, total_dreams, total_points)
+            SELECT :base + n, 1, 10 FROM generate_series(1, :users) AS n
+            """
+        ),
+        {'base': USER_ID_BASE, 'users': users},
+    )
+    for table in ('"user"', 'dream', 'user_achievements', 'user_progress'):
+        await conn.execute(text(f'ANALYZE {table}'))
+
+
+def hot_queries(user_id: int) -> dict:
+    """Statements matching the repository queries."""
+    return {
+        'DreamRepo.get_dreams_of_user': select(Dream).where(Dream.user_id == user_id).limit(100),
+        'DreamRepo.get_dream_cards_after': (
+            select(Dream.id, Dream.name, DreamMedia.file_id, User.name, User.gender, User.country)
+            .outerjoin(User, User.user_id == Dream.user_id)
+            .outerjoin(DreamMedia, DreamMedia.sha256 == Dream.image_hash)
+            .where(Dream.id > 0, Dream.user_id != user_id)
+            .order_by(Dream.id)
+            .limit(conf.feed.batch_size)
+        ),
+        'AchievementsRepository.is_achievement_unlocked': select(UserAchievement).where(
+            UserAchievement.user_id == user_id,
+            UserAchievement.achievement_id == 'first_dream',
+        ),
+        'ProgressRepository.get_user_progress': select(UserProgress).where(UserProgress.user_id == user_id),
+    }
+
+
+async def explain(conn: AsyncConnection, statement) -> str:
+    """Get plan of the statement with real execution stats."""
+    sql = statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+    result = await conn.execute(text(f'EXPLAIN (ANALYZE, BUFFERS) {sql}'))
+    return '\n'.join(row[0] for row in result)
+
+
+def execution_time(plan: str) -> str:
+    """Extract execution time from the plan."""
+    match = re.search(r'Execution Time: ([\d.]+ ms)', plan)
+    return match.group(1) if match else '?'
+
+
+async def print_plans(conn: AsyncConnection, title: str, user_id: int) -> None:
+    """Print plans of all hot queries."""
+    print(f'\n===== {title} =====')
+    for name, statement in hot_queries(user_id).items():
+        plan = await explain(conn, statement)
+        print(f'\n--- {name} ({execution_time(plan)})\n{plan}')
+
+
+async def main(users: int, dreams: int, achievements: int) -> None:
+    """Seed data and compare plans."""
+    engine = create_async_engine(conf.db.build_connection_str())
+    user_id = USER_ID_BASE + users // 2
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            await seed(conn, users, dreams, achievements)
+
+            async with conn.begin_nested() as savepoint:
+                for index in INDEXES:
+                    await conn.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+                await print_plans(conn, 'Without indexes', user_id)
+                await savepoint.rollback()
+
+            for index in INDEXES:
+                await conn.execute(CreateIndex(index, if_not_exists=True))
+            await conn.execute(text('ANALYZE dream, user_achievements'))
+            await print_plans(conn, 'With indexes', user_id)
+        finally:
+            await transaction.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--dreams', type=int, default=200000)
+    parser.add_argument('--achievements', type=int, default=5, help='Achievements per user')
+    args = parser.parse_args()
+
+    asyncio.run(main(args.users, args.dreams, args.achievements))
@@ -0,0 +1,67 @@
+"""move dream images to media
+
+Revision ID: 7a9e3c1d5b20
+Revises: 5c2d7e9a1f34
+Create Date: 2026-10-18 11:02:17.284603
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a9e3c1d5b20'
+down_revision = '5c2d7e9a1f34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('dream_media',
+    sa.Column('sha256', sa.Text(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('file_id', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_dream_media')),
+    sa.UniqueConstraint('sha256', name=op.f('uq_dream_media_sha256'))
+    )
+    op.add_column('dream', sa.Column('image_hash', sa.Text(), nullable=True))
+
+    # Переносим изображения: одинаковое содержимое сохраняется один раз
+    op.execute(
+        """
+        INSERT INTO dream_media (sha256, data, size, file_id)
+        SELECT DISTINCT ON (encode(sha256(image), 'hex'))
+               encode(sha256(image), 'hex'), image, octet_length(image), image_file_id
+        FROM dream
+        WHERE image IS NOT NULL
+        ORDER BY encode(sha256(image), 'hex'), image_file_id IS NULL, id
+        """
+    )
+    op.execute(
+        """
+        UPDATE dream SET image_hash = encode(sha256(image), 'hex')
+        WHERE image IS NOT NULL
+        """
+    )
+
+    op.create_foreign_key(op.f('fk_dream_image_hash_dream_media'), 'dream', 'dream_media', ['image_hash'], ['sha256'])
+    op.drop_column('dream', 'image_file_id')
+    op.drop_column('dream', 'image')
+
+
+def downgrade() -> None:
+    op.add_column('dream', sa.Column('image', sa.LargeBinary(), nullable=True))
+    op.add_column('dream', sa.Column('image_file_id', sa.Text(), nullable=True))
+    op.execute(
+        """
+        UPDATE dream SET image = dream_media.data, image_file_id = dream_media.file_id
+        FROM dream_media
+        WHERE dream.image_hash = dream_media.sha256
+        """
+    )
+    op.drop_constraint(op.f('fk_dream_image_hash_dream_media'), 'dream', type_='foreignkey')
+    op.drop_column('dream', 'image_hash')
+    op.drop_table('dream_media')
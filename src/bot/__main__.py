@@ -13,6 +13,8 @@ from src.bot.logic.dreams import periodic_dream_notification
 from src.bot.logic.dreams import clear_current_records
 from src.bot.dispatcher import get_dispatcher, get_redis_storage
 from src.bot.structures.data_structure import TransferData
+from src.bot.structures.downloader import FileDownloader
+from src.bot.structures.rate_limiter import RateLimiter, RateLimitMiddleware
 from src.bot.logic.bot_commands import bot_commands
 from src.configuration import conf
 from src.db.database import create_async_engine
@@ -40,6 +42,9 @@ async def start_bot():
     
     storage = get_redis_storage(redis=redis_client)
 
+    # Все исходящие сообщения проходят через общий для процессов ограничитель скорости
+    bot.session.middleware(RateLimitMiddleware(RateLimiter(redis_client)))
+
     commands_for_bot = []
     for cmd in bot_commands:
         commands_for_bot.append(BotCommand(command=cmd[0], description=cmd[1]))
@@ -54,8 +59,18 @@ async def start_bot():
 
     # Create engine with connection pooling
     engine = create_async_engine(url=conf.db.build_connection_str())
+    # Чтения уходят на реплику, если она настроена
+    read_engine = (
+        create_async_engine(url=conf.db.build_connection_str(read_replica=True))
+        if conf.db.read_host else None
+    )
     
-    dp = get_dispatcher(engine=engine, redis_client=redis_client, storage=storage)
+    # Общий загрузчик файлов из Telegram с ограничением размера
+    downloader = FileDownloader()
+
+    dp = get_dispatcher(
+        engine=engine, redis_client=redis_client, storage=storage, read_engine=read_engine, downloader=downloader
+    )
 
     await dp.start_polling(
         bot,
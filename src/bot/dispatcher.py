@@ -6,13 +6,26 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.fsm.strategy import FSMStrategy
 from redis.asyncio.client import Redis
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from src.configuration import conf
+from src.db.cache import UserCache
+from src.db.database import DatabaseHealthCheck, create_sessionmaker
 
 from .logic import routers
+from .logic.dreams.select import send_like_digest
 from .middlewares.database_md import DatabaseMiddleware
+from .middlewares.downloader_md import DownloaderMiddleware
+from .middlewares.feed_md import FeedMiddleware
+from .middlewares.imaging_md import ImageProcessorMiddleware
+from .middlewares.progress_md import ProgressMiddleware
 from .middlewares.redis_md import RedisMiddleware
+from .structures.downloader import FileDownloader
+from .structures.feed import DreamFeed
+from .structures.imaging import ImageProcessor
+from .structures.like_digest import LikeDigestWorker
+from .structures.progress import ProgressBuffer
+from .structures.redis_cache import RedisCache
 
 
 
@@ -37,8 +50,16 @@ def get_dispatcher(
     storage: BaseStorage = MemoryStorage(),
     fsm_strategy: FSMStrategy | None = FSMStrategy.CHAT,
     event_isolation: BaseEventIsolation | None = None,
+    read_engine: AsyncEngine | None = None,
+    downloader: FileDownloader | None = None,
+    image_processor: ImageProcessor | None = None,
 ):
-    """This function set up dispatcher with routers, filters and middlewares."""
+    """This function set up dispatcher with routers, filters and middlewares.
+
+    :param read_engine: (Optional) Read replica engine for read-only queries
+    :param downloader: (Optional) Shared downloader of Telegram files
+    :param image_processor: (Optional) Process pool which re-encodes dream images
+    """
     dp = Dispatcher(
         storage=storage,
         fsm_strategy=fsm_strategy,
@@ -48,16 +69,35 @@ def get_dispatcher(
         dp.include_router(router)
 
     # Create session maker with connection pooling
-    sessionmaker = async_sessionmaker(
-        bind=engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autoflush=False,
-        autocommit=False
-    )
+    sessionmaker = create_sessionmaker(engine, read_engine)
 
     # Register middlewares
-    dp.update.middleware.register(DatabaseMiddleware(sessionmaker))
+    dp.update.middleware.register(DatabaseMiddleware(sessionmaker, UserCache(redis_client)))
     dp.update.middleware.register(RedisMiddleware(redis_client))
+    dp.update.middleware.register(FeedMiddleware(DreamFeed(redis_client, sessionmaker)))
+
+    downloader = downloader or FileDownloader()
+    dp.update.middleware.register(DownloaderMiddleware(downloader))
+
+    # Перекодирование изображений идет в отдельных процессах, чтобы не блокировать цикл событий
+    image_processor = image_processor or ImageProcessor()
+    dp.update.middleware.register(ImageProcessorMiddleware(image_processor))
+    dp.shutdown.register(image_processor.close)
+
+    # Счетчики прогресса копятся в Redis и периодически записываются в базу
+    progress_buffer = ProgressBuffer(redis_client, sessionmaker)
+    dp.update.middleware.register(ProgressMiddleware(progress_buffer))
+    dp.startup.register(progress_buffer.start)
+    dp.shutdown.register(progress_buffer.stop)
+
+    # Дайджесты лайков отправляются в фоне после паузы, а не в запросе того, кто лайкнул
+    like_digest = LikeDigestWorker(RedisCache(redis_client), sessionmaker, send_like_digest)
+    dp.startup.register(like_digest.start)
+    dp.shutdown.register(like_digest.stop)
+
+    if conf.db.health_check_interval:
+        health_check = DatabaseHealthCheck(engine, conf.db.health_check_interval)
+        dp.startup.register(health_check.start)
+        dp.shutdown.register(health_check.stop)
 
     return dp
@@ -16,7 +16,7 @@ achievements_router = Router(name='achievements')
 
 @achievements_router.message(Command(commands='achievements'))
 @achievements_router.message(F.text == "🏆 Достижения")
-async def achievements_handler(message: types.Message, db):
+async def achievements_handler(message: types.Message, db, progress_buffer):
     """Show user achievements and progress."""
     user_id = message.from_user.id
     
@@ -32,11 +32,8 @@ async def achievements_handler(message: types.Message, db):
         )
         return
     
-    # Получаем реальную статистику пользователя из БД
-    user_progress = await db.progress.get_user_progress(user_id)
-    if not user_progress:
-        # Если прогресса нет, создаем запись
-        user_progress = await db.progress.create_user_progress(user_id)
+    # Получаем статистику пользователя из БД вместе с еще не записанными счетчиками
+    user_progress = await progress_buffer.get_progress(user_id, db)
     
     user_stats = {
         "total_dreams": user_progress.total_dreams,
@@ -199,7 +196,7 @@ async def category_callback(callback_query: types.CallbackQuery):
 
 @achievements_router.message(Command(commands='stats'))
 @achievements_router.message(F.text == "📊 Статистика")
-async def stats_handler(message: types.Message, db):
+async def stats_handler(message: types.Message, db, progress_buffer):
     """Show user statistics."""
     user_id = message.from_user.id
     
@@ -215,11 +212,8 @@ async def stats_handler(message: types.Message, db):
         )
         return
     
-    # Получаем реальную статистику пользователя из БД
-    user_progress = await db.progress.get_user_progress(user_id)
-    if not user_progress:
-        # Если прогресса нет, создаем запись
-        user_progress = await db.progress.create_user_progress(user_id)
+    # Получаем статистику пользователя из БД вместе с еще не записанными счетчиками
+    user_progress = await progress_buffer.get_progress(user_id, db)
     
     user_stats = {
         "total_dreams": user_progress.total_dreams,
@@ -334,7 +328,7 @@ async def _show_category_details(message: types.Message, category):
 
 # Callback обработчики для inline кнопок
 @achievements_router.callback_query(lambda c: c.data == "show_achievements")
-async def show_achievements_callback(callback_query: types.CallbackQuery, db):
+async def show_achievements_callback(callback_query: types.CallbackQuery, db, progress_buffer):
     """Show achievements via callback."""
     await callback_query.answer()
     
@@ -348,7 +342,7 @@ async def show_achievements_callback(callback_query: types.CallbackQuery, db):
         'answer': callback_query.message.answer
     })()
     
-    await achievements_handler(mock_message, db)
+    await achievements_handler(mock_message, db, progress_buffer)
 
 
 @achievements_router.callback_query(lambda c: c.data == "show_categories")
@@ -359,7 +353,7 @@ async def show_categories_callback(callback_query: types.CallbackQuery):
 
 
 @achievements_router.callback_query(lambda c: c.data == "show_stats")
-async def show_stats_callback(callback_query: types.CallbackQuery, db):
+async def show_stats_callback(callback_query: types.CallbackQuery, db, progress_buffer):
     """Show stats via callback."""
     await callback_query.answer()
     
@@ -373,7 +367,7 @@ async def show_stats_callback(callback_query: types.CallbackQuery, db):
         'answer': callback_query.message.answer
     })()
     
-    await stats_handler(mock_message, db)
+    await stats_handler(mock_message, db, progress_buffer)
 
 
 @achievements_router.callback_query(lambda c: c.data == "show_help")
@@ -411,7 +405,7 @@ async def find_dreams_callback(callback_query: types.CallbackQuery):
 
 
 @achievements_router.callback_query(lambda c: c.data == "show_profile")
-async def show_profile_callback(callback_query: types.CallbackQuery, db):
+async def show_profile_callback(callback_query: types.CallbackQuery, db, progress_buffer):
     """Show profile via callback."""
     await callback_query.answer("Профиль")
     
@@ -426,7 +420,7 @@ async def show_profile_callback(callback_query: types.CallbackQuery, db):
     })()
     
     from src.bot.logic.profile.select import profile_handler
-    await profile_handler(mock_message, db)
+    await profile_handler(mock_message, db, progress_buffer)
 
 
 @achievements_router.callback_query(lambda c: c.data == "show_my_dreams")
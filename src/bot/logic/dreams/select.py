@@ -2,8 +2,6 @@
 import logging
 
 import emoji
-import aiohttp
-import hashlib
 
 from aiogram import types
 from aiogram import F
@@ -19,47 +17,13 @@ from src.bot.structures.keyboards.dreams import (
     REGISTRATION_REQUIRED_MARKUP
 )
 from src.bot.structures.keyboards.menu import MENU_KEYBOARD
+from src.bot.structures.media import save_dream_photo, send_dream_photo
 
 from .router import dreams_router
 from src.bot.structures.fsm.dream_create import DreamGroup
 from src.bot.structures.fsm.register import RegisterGroup
 
 
-async def get_image_content(photo, bot, redis_cache=None):
-    """Асинхронно загружает изображение с кэшированием."""
-    try:
-        photo_file = await bot.get_file(photo.file_id)
-        photo_url = photo_file.file_path
-        
-        # Создаем хеш для кэширования
-        cache_key = hashlib.md5(photo_url.encode()).hexdigest()
-        
-        # Проверяем Redis кэш
-        if redis_cache:
-            cached_image = await redis_cache.get_image_cache(cache_key)
-            if cached_image:
-                return cached_image
-        
-        # Асинхронная загрузка изображения
-        bot_token = bot.token
-        request_url = f"https://api.telegram.org/file/bot{bot_token}/{photo_url}"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(request_url) as response:
-                if response.status == 200:
-                    image_content = await response.read()
-                    # Кэшируем в Redis
-                    if redis_cache:
-                        await redis_cache.set_image_cache(cache_key, image_content)
-                    return image_content
-                    
-    except Exception as e:
-        logging.error(f"Ошибка при загрузке изображения: {e}")
-        return None
-    
-    return None
-
-
 @dreams_router.message(F.text.lower() == "отмена")
 async def cancel_handler(message: Message, state: FSMContext) -> None:
     current_state = await state.get_state()
@@ -208,19 +172,20 @@ async def dream_description_handler(message: Message, state: FSMContext):
 
 
 @dreams_router.message(DreamGroup.image)
-async def dream_image_handler(message: Message, state: FSMContext, db, redis_cache=None):
+async def dream_image_handler(message: Message, state: FSMContext, db, downloader, image_processor):
     data = await state.get_data()
     description = data.get('description', '')
     category = data.get('category', '')
 
-    dream_image = None
+    dream_image_hash = None
     if message.photo:
-        photo = message.photo[-1]
-        # Передаем bot объект для работы с файлами
-        dream_image = await get_image_content(photo, message.bot, redis_cache)
+        try:
+            dream_image_hash = await save_dream_photo(message.bot, message.photo[-1], db, downloader, image_processor)
+        except Exception as e:
+            logging.error(f"Ошибка при загрузке изображения: {e}")
     elif message.text and message.text.lower() == "без изображения":
         # Пользователь выбрал создать желание без изображения
-        dream_image = None
+        dream_image_hash = None
     else:
         # Если отправлен не фото и не "без изображения", просим отправить фото или выбрать опцию
         await message.answer(
@@ -241,7 +206,7 @@ async def dream_image_handler(message: Message, state: FSMContext, db, redis_cac
         await db.dream.new(
             user_id=message.from_user.id,
             username=message.from_user.username,
-            image=dream_image,
+            image_hash=dream_image_hash,
             name=data.get('name', ''),
             description=description,
             category=category
@@ -290,20 +255,9 @@ async def dream_image_handler(message: Message, state: FSMContext, db, redis_cac
 
 
 async def edit_message_with_dream(message, dream, db, user=None):
-    """Edit existing message with new dream content."""
+    """Edit existing message with new dream card."""
     try:
-        dream_user = await db.user.get_user_by_id(user_id=dream.user_id)
-        user_gender = emoji.emojize(':man:') if dream_user and dream_user.gender == 'Мужчина' else emoji.emojize(':woman:')
-        formatted_date = dream.created_at.strftime("%d.%m.%Y")
-
-        text = (
-            f"\n*Тема*: {dream.name}\n"
-            f"*Описание*: {dream.description}\n"
-            f"*Категория*: {dream.category if dream.category else 'Не указана'}\n"
-            f"*Город*: {dream_user.country if dream_user else 'Другой'}\n"
-            f"*Автор*: {dream_user.name if dream_user else 'Анонимный'} {user_gender}\n"
-            f"*Дата создания*: {formatted_date}"
-        )
+        text = dream.text
 
         # Выбираем клавиатуру в зависимости от статуса регистрации пользователя
         if user:
@@ -315,11 +269,13 @@ async def edit_message_with_dream(message, dream, db, user=None):
             from src.bot.structures.keyboards.dreams import REGISTRATION_REQUIRED_MARKUP
             reply_markup = REGISTRATION_REQUIRED_MARKUP
 
-        if dream.image:
+        if dream.has_image:
             # Если есть изображение, отправляем новое сообщение с фото
-            await message.bot.send_photo(
+            await send_dream_photo(
+                message.bot,
                 message.chat.id,
-                types.BufferedInputFile(dream.image, filename=f"user_photo_{dream.id}.png"),
+                dream,
+                db,
                 caption=text,
                 reply_markup=reply_markup,
                 parse_mode='MARKDOWN'
@@ -356,18 +312,7 @@ async def dreams_view_func(dream, message, db, user=None):
         await message.answer(no_dreams_text, reply_markup=DREAMS_NOT_FOUND_INLINE_MARKUP, parse_mode="MARKDOWN")
         return
 
-    dream_user = await db.user.get_user_by_id(user_id=dream.user_id)
-    user_gender = emoji.emojize(':man:') if dream_user and dream_user.gender == 'Мужчина' else emoji.emojize(':woman:')
-    formatted_date = dream.created_at.strftime("%d.%m.%Y")
-
-    text = (
-        f"\n*Тема*: {dream.name}\n"
-        f"*Описание*: {dream.description}\n"
-        f"*Категория*: {dream.category if dream.category else 'Не указана'}\n"
-        f"*Город*: {dream_user.country if dream_user else 'Другой'}\n"
-        f"*Автор*: {dream_user.name if dream_user else 'Анонимный'} {user_gender}\n"
-        f"*Дата создания*: {formatted_date}"
-    )
+    text = dream.text
 
     # Выбираем клавиатуру в зависимости от статуса регистрации пользователя
     if user:
@@ -379,10 +324,12 @@ async def dreams_view_func(dream, message, db, user=None):
         from src.bot.structures.keyboards.dreams import REGISTRATION_REQUIRED_MARKUP
         reply_markup = REGISTRATION_REQUIRED_MARKUP
 
-    if dream.image:
-        await message.bot.send_photo(
+    if dream.has_image:
+        await send_dream_photo(
+            message.bot,
             message.chat.id,
-            types.BufferedInputFile(dream.image, filename=f"user_photo_{dream.id}.png"),
+            dream,
+            db,
             caption=text,
             reply_markup=reply_markup,
             parse_mode='MARKDOWN'
@@ -394,25 +341,20 @@ async def dreams_view_func(dream, message, db, user=None):
 @dreams_router.message(F.text.lower().startswith('желания'))
 @dreams_router.message(F.text == f"Желания {emoji.emojize(':thought_balloon:')}")
 @dreams_router.message(Command(commands='dreams'))
-async def process_dreams_handler(message: types.Message, state: FSMContext, db, redis_cache=None):
+async def process_dreams_handler(message: types.Message, state: FSMContext, db, feed, progress_buffer, redis_cache=None):
     user_id = message.from_user.id
     user = await db.user.user_register_check(active_user_id=user_id)
 
     if user:
-        # Сбрасываем offset при начале нового просмотра желаний
-        if redis_cache:
-            await redis_cache.reset_user_offset(user_id)
-            logging.info(f"User {user_id} dreams offset reset to 0")
-        
         # Добавляем очки за просмотр желаний
         try:
-            await db.progress.increment_dreams_viewed(user_id, 1)
+            await progress_buffer.add(user_id, 'total_dreams_viewed', 1)
         except Exception as e:
             logging.warning(f"Could not update dreams viewed for user {user_id}: {e}")
             # Продолжаем выполнение, даже если достижения не обновились
         
-        # Получаем первое желание других пользователей (не свои)
-        dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=0)
+        # Продолжаем ленту с текущего желания, заранее загруженная очередь сохраняется
+        dream = await feed.current(user_id, db)
         logging.info(f"User {user_id} started viewing dreams, first dream: {dream.name if dream else 'None'}")
         await dreams_view_func(dream=dream, message=message, db=db, user=user)
     else:
@@ -447,14 +389,8 @@ async def send_notification_to_author(author_id, dream, message, redis_cache=Non
                 "user_id": message.from_user.id,
                 "first_name": message.from_user.first_name
             }
+            # Дайджест отправит фоновый обработчик, когда лайки перестанут поступать
             await redis_cache.add_like_notification(author_id, dream.id, liker_info)
-            
-            # Проверяем, есть ли уже ожидающие уведомления
-            pending_notifications = await redis_cache.get_pending_like_notifications(author_id)
-            
-            # Если это первое уведомление, отправляем группированное сообщение
-            if len(pending_notifications) == 1:
-                await send_grouped_like_notification(author_id, dream, pending_notifications, message.bot, redis_cache)
         else:
             # Если Redis недоступен, отправляем обычное уведомление
             await send_single_like_notification(author_id, dream, message)
@@ -468,60 +404,54 @@ async def send_notification_to_author(author_id, dream, message, redis_cache=Non
             logging.error(f"Fallback notification also failed: {fallback_error}")
 
 
-async def send_grouped_like_notification(author_id, dream, notifications, bot, redis_cache=None):
-    """Отправляет группированное уведомление о нескольких лайках."""
+def _liker_name(liker):
+    return liker.get("username") or f"Пользователь {liker.get('first_name', 'Неизвестный')}"
+
+
+async def send_grouped_like_notification(author_id, dream_notifications, bot, redis_cache=None):
+    """Отправляет одно группированное уведомление о лайках всех желаний автора.
+
+    :param dream_notifications: Пары (желание, его уведомления) в порядке поступления лайков
+    """
+    likes_count = sum(len(notifications) for _, notifications in dream_notifications)
     try:
-        if len(notifications) == 1:
+        if likes_count == 1:
             # Один лайк
-            liker = notifications[0]["liker_info"]
-            liker_name = liker.get("username", f"Пользователь {liker.get('first_name', 'Неизвестный')}")
-            
+            dream, notifications = dream_notifications[0]
             notification_message = (
                 f"🎉 **Отличные новости!** 🎉\n\n"
                 f"Твое желание **{dream.name}** получило лайк! ❤️\n\n"
                 "**🏆 Достижения:**\n"
                 "• +5 очков за получение лайка\n"
                 "• Прогресс к достижению 'Популярный мечтатель'\n\n"
-                f"**Кто заинтересовался:** {liker_name}\n\n"
+                f"**Кто заинтересовался:** {_liker_name(notifications[0]['liker_info'])}\n\n"
                 f"**🤔 Хочешь узнать, кто это?**\n"
                 f"Можешь поделиться контактом для дальнейшего общения."
             )
         else:
-            # Несколько лайков
+            # Несколько лайков, возможно к разным желаниям
             likers_info = []
-            for notification in notifications:
-                liker = notification["liker_info"]
-                liker_name = liker.get("username", f"Пользователь {liker.get('first_name', 'Неизвестный')}")
-                likers_info.append(f"• {liker_name}")
-            
+            for dream, notifications in dream_notifications:
+                likers_info.append(f"**{dream.name}:**")
+                likers_info.extend(f"• {_liker_name(notification['liker_info'])}" for notification in notifications)
+
             notification_message = (
                 f"🎉 **Отличные новости!** 🎉\n\n"
-                f"Твое желание **{dream.name}** получило **{len(notifications)} лайков**! ❤️\n\n"
+                f"Твои желания получили **{likes_count} лайков**! ❤️\n\n"
                 "**🏆 Достижения:**\n"
-                f"• +{len(notifications) * 5} очков за получение лайков\n"
+                f"• +{likes_count * 5} очков за получение лайков\n"
                 "• Прогресс к достижению 'Популярный мечтатель'\n\n"
                 f"**Кто заинтересовался:**\n" + "\n".join(likers_info) + "\n\n"
                 f"**🤔 Хочешь узнать, кто это?**\n"
                 f"Можешь поделиться контактом для дальнейшего общения."
             )
 
-        # Создаем кнопки для ответа
-        # Для группированных уведомлений добавляем информацию о первом лайкнувшем
-        first_liker = notifications[0]["liker_info"]
-        liker_username = first_liker.get("username", str(first_liker.get("user_id", "unknown")))
-        dream_username = dream.username or str(dream.user_id)
-        # Используем user_id автора желания как chat_id, так как уведомление отправляется автору
-        chat_id = str(dream.user_id)
-        dream_id = str(dream.id)
-        
-        # Создаем callback данные с полной информацией
-        callback_data = f"{liker_username} {dream_username} {chat_id} {dream_id}"
-        
+        # Кнопки относятся ко всему дайджесту автора, поэтому в них нужен только его id
         reply_markup = InlineKeyboardMarkup(
             inline_keyboard=[
                 [
-                    InlineKeyboardButton(text='Да, поделиться контактом', callback_data=f"share_contact_grouped {callback_data}"),
-                    InlineKeyboardButton(text='Нет, спасибо', callback_data=f"not_share_contact_grouped {callback_data}")
+                    InlineKeyboardButton(text='Да, поделиться контактом', callback_data=f"share_contact_grouped {author_id}"),
+                    InlineKeyboardButton(text='Нет, спасибо', callback_data=f"not_share_contact_grouped {author_id}")
                 ]
             ]
         )
@@ -537,10 +467,10 @@ async def send_grouped_like_notification(author_id, dream, notifications, bot, r
         logging.error(f"Error sending grouped notification: {e}")
         # Пытаемся отправить обычное уведомление как fallback
         try:
-            if len(notifications) > 0:
+            if dream_notifications:
+                dream, notifications = dream_notifications[0]
                 first_notification = notifications[0]
                 # Создаем mock message объект для fallback
-                from aiogram.types import Message
                 mock_message = type('MockMessage', (), {
                     'from_user': type('MockUser', (), {
                         'username': first_notification.get('liker_info', {}).get('username', 'unknown'),
@@ -604,20 +534,23 @@ async def send_single_like_notification(author_id, dream, message):
             logging.error(f"Simple notification also failed: {simple_error}")
 
 
-async def send_pending_notifications_periodically(bot, db, redis_cache):
-    """Периодически отправляет группированные уведомления о лайках."""
-    try:
-        if not redis_cache:
-            return
-        
-        # Получаем всех пользователей с ожидающими уведомлениями
-        # Это можно оптимизировать, добавив список активных пользователей в Redis
-        
-        # Пока что просто логируем
-        logging.info("Checking for pending notifications...")
-        
-    except Exception as e:
-        logging.error(f"Error in periodic notification sender: {e}")
+async def send_like_digest(bot, db, author_id, notifications):
+    """Отправляет автору дайджест лайков, накопившихся за время паузы."""
+    # Группируем лайки по желаниям, сохраняя порядок их поступления
+    notifications_by_dream = {}
+    for notification in notifications:
+        notifications_by_dream.setdefault(notification["dream_id"], []).append(notification)
+
+    dream_notifications = []
+    for dream_id, notifications_of_dream in notifications_by_dream.items():
+        dream = await db.dream.get_dream_by_id(dream_id)
+        # Желание могли удалить, пока копились лайки
+        if dream:
+            dream_notifications.append((dream, notifications_of_dream))
+
+    # Одно сообщение на весь дайджест: кнопки в нем забирают лайки всех желаний автора
+    if dream_notifications:
+        await send_grouped_like_notification(author_id, dream_notifications, bot)
 
 
 @dreams_router.callback_query(lambda c: c.data.startswith("share_contact") and not c.data.startswith("share_contact_grouped"))
@@ -725,7 +658,7 @@ async def not_share_contact_callback_handler(callback_query: CallbackQuery, db,
 
 
 @dreams_router.message(F.text.lower() == emoji.emojize(":red_heart:"))
-async def process_like_command(message: types.Message, db, redis_cache=None):
+async def process_like_command(message: types.Message, db, feed, progress_buffer, redis_cache=None):
     user_id = message.from_user.id
     
     # Проверяем, что это не бот
@@ -761,12 +694,8 @@ async def process_like_command(message: types.Message, db, redis_cache=None):
     
     logging.info(f"User {user_id} is registered, proceeding with like")
     
-    # Используем Redis кэш для offset
-    offset = await redis_cache.get_user_offset(user_id) if redis_cache else 0
-    logging.info(f"User {user_id} liked dream at offset {offset}")
-    
-    # Получаем текущее желание других пользователей
-    dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset)
+    # Получаем текущее желание других пользователей из ленты
+    dream = await feed.current(user_id, db)
     
     if not dream:
         await message.answer("Желание не найдено или больше нет доступных желаний")
@@ -784,15 +713,8 @@ async def process_like_command(message: types.Message, db, redis_cache=None):
         }
         
         if redis_cache:
-            # Добавляем уведомление в очередь для группировки
+            # Дайджест отправит фоновый обработчик, когда лайки перестанут поступать
             await redis_cache.add_like_notification(author_id, dream.id, liker_info)
-            
-            # Проверяем, есть ли уже ожидающие уведомления
-            pending_notifications = await redis_cache.get_pending_like_notifications(author_id)
-            
-            # Если это первое уведомление, отправляем группированное сообщение
-            if len(pending_notifications) == 1:
-                await send_grouped_like_notification(author_id, dream, pending_notifications, message.bot, redis_cache)
         else:
             # Если Redis недоступен, отправляем обычное уведомление
             await send_single_like_notification(author_id, dream, message)
@@ -814,14 +736,14 @@ async def process_like_command(message: types.Message, db, redis_cache=None):
     # Добавляем очки автору желания
     if author_id:
         try:
-            await db.progress.increment_likes_received(author_id, 5)
+            await progress_buffer.add(author_id, 'total_likes_received', 5)
             
             # Проверяем достижение "Популярный мечтатель" (25 лайков)
-            author_progress = await db.progress.get_user_progress(author_id)
+            author_progress = await progress_buffer.get_progress(author_id, db)
             if author_progress and author_progress.total_likes_received >= 25:
                 if not await db.achievements.is_achievement_unlocked(author_id, "popular_dreamer"):
                     await db.achievements.unlock_achievement(author_id, "popular_dreamer", 75)
-                    await db.progress.increment_likes_received(author_id, 75)  # Дополнительные очки за достижение
+                    await progress_buffer.add(author_id, 'total_likes_received', 75)  # Дополнительные очки за достижение
         except Exception as e:
             logging.warning(f"Could not update achievements for user {author_id}: {e}")
     
@@ -847,26 +769,19 @@ async def process_like_command(message: types.Message, db, redis_cache=None):
         return
     
     try:
-        await db.progress.increment_likes_given(user_id, 2)
+        await progress_buffer.add(user_id, 'total_likes_given', 2)
         
         # Проверяем достижение "Общительная бабочка" (100 лайков)
-        user_progress = await db.progress.get_user_progress(user_id)
+        user_progress = await progress_buffer.get_progress(user_id, db)
         if user_progress and user_progress.total_likes_given >= 100:
             if not await db.achievements.is_achievement_unlocked(user_id, "social_butterfly"):
                 await db.achievements.unlock_achievement(user_id, "social_butterfly", 60)
-                await db.progress.increment_likes_given(user_id, 60)  # Дополнительные очки за достижение
+                await progress_buffer.add(user_id, 'total_likes_given', 60)  # Дополнительные очки за достижение
     except Exception as e:
         logging.warning(f"Could not update achievements for user {user_id}: {e}")
 
-    # Увеличиваем offset для следующего желания
-    if redis_cache:
-        new_offset = await redis_cache.increment_user_offset(user_id)
-        logging.info(f"User {user_id} offset incremented to {new_offset}")
-        # Используем новый offset для получения следующего желания других пользователей
-        next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=new_offset)
-    else:
-        # Если Redis недоступен, используем старый offset + 1
-        next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset + 1)
+    # Переходим к следующему желанию в ленте
+    next_dream = await feed.advance(user_id, db, seen_id=dream.id)
     
     # Если следующее желание не найдено, показываем сообщение
     if not next_dream:
@@ -901,7 +816,7 @@ async def process_like_command(message: types.Message, db, redis_cache=None):
 
 
 @dreams_router.message(F.text.lower() == emoji.emojize(":thumbs_down:"))
-async def process_dislike_command(message: types.Message, db, redis_cache=None):
+async def process_dislike_command(message: types.Message, db, feed, redis_cache=None):
     user_id = message.from_user.id
     
     # Проверяем, что это не бот
@@ -929,12 +844,8 @@ async def process_dislike_command(message: types.Message, db, redis_cache=None):
         )
         return
     
-    # Используем Redis кэш для offset
-    offset = await redis_cache.get_user_offset(user_id) if redis_cache else 0
-    logging.info(f"User {user_id} disliked dream at offset {offset}")
-    
-    # Получаем текущее желание других пользователей
-    dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset)
+    # Получаем текущее желание других пользователей из ленты
+    dream = await feed.current(user_id, db)
     
     if not dream:
         await message.answer("Желание не найдено или больше нет доступных желаний")
@@ -960,15 +871,8 @@ async def process_dislike_command(message: types.Message, db, redis_cache=None):
         )
         return
     
-    # Увеличиваем offset для следующего желания
-    if redis_cache:
-        new_offset = await redis_cache.increment_user_offset(user_id)
-        logging.info(f"User {user_id} offset incremented to {new_offset}")
-        # Используем новый offset для получения следующего желания других пользователей
-        next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=new_offset)
-    else:
-        # Если Redis недоступен, используем старый offset + 1
-        next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset + 1)
+    # Переходим к следующему желанию в ленте
+    next_dream = await feed.advance(user_id, db, seen_id=dream.id)
     
     # Если следующее желание не найдено, показываем сообщение
     if not next_dream:
@@ -1022,27 +926,23 @@ async def process_sleep_command(message: types.Message, db):
 
 
 @dreams_router.message(F.text.lower() == "🔄 начать сначала")
-async def process_restart_command(message: types.Message, db, redis_cache=None):
+async def process_restart_command(message: types.Message, db, feed, redis_cache=None):
     user_id = message.from_user.id
     user = await db.user.user_register_check(active_user_id=user_id)
 
     if user:
-        # Сбрасываем offset и начинаем сначала
-        if redis_cache:
-            await redis_cache.reset_user_offset(user_id)
-        
         restart_text = (
             "🔄 **Начинаем сначала!** 🔄\n\n"
-            "Отлично! Теперь ты снова будешь видеть все желания с самого начала.\n\n"
+            "Отлично! Лента желаний начнется с самого начала.\n\n"
             "**💡 Что изменилось:**\n"
             "• Счетчик просмотров сброшен\n"
             "• Показываем первое желание\n"
-            "• Можешь заново оценить все желания\n\n"
+            "• Уже оцененные желания больше не показываются\n\n"
             "**🚀 Начинаем просмотр:**"
         )
         
-        # Получаем первое желание
-        dream = await db.dream.get_dream(user_id=user_id, offset=0)
+        # Начинаем ленту заново и получаем первое желание
+        dream = await feed.reset(user_id, db)
         await message.answer(restart_text, parse_mode="MARKDOWN")
         await dreams_view_func(dream=dream, message=message, db=db, user=user)
     else:
@@ -1099,43 +999,45 @@ async def category_selection_callback(callback_query: types.CallbackQuery, state
 async def share_contact_grouped_callback_handler(callback_query: CallbackQuery, db, redis_cache=None):
     """Handle grouped share contact callback."""
     try:
-        # Парсим callback данные: "share_contact_grouped {liker_username} {dream_username} {chat_id} {dream_id}"
-        data_parts = callback_query.data.split(' ')
-        if len(data_parts) < 5:
-            await callback_query.answer("Недостаточно данных для обработки")
-            return
-            
-        liker_username_id, dream_username_id, chat_id, dream_id = data_parts[1:5]
-        dream = await db.dream.get_dream_by_id(dream_id=dream_id)
-        
-        if not dream:
-            await callback_query.answer("Желание не найдено")
-            return
-        
-        # Получаем все ожидающие уведомления для этого желания
+        # Дайджест отправляется только автору, поэтому его лайки забираем по id нажавшего
+        author_id = callback_query.from_user.id
+
         if not redis_cache:
             await callback_query.answer("Redis недоступен")
             return
             
-        pending_notifications = await redis_cache.get_pending_like_notifications(dream.user_id)
+        # Забираем уведомления вместе с очисткой, чтобы повторное нажатие их не показало
+        pending_notifications = await redis_cache.drain_like_notifications(author_id)
         
         if not pending_notifications:
             await callback_query.answer("Нет активных уведомлений")
             return
-        
-        # Отправляем информацию о всех лайкнувших
-        likers_info = []
+
+        # Дайджест может включать лайки нескольких желаний
+        notifications_by_dream = {}
         for notification in pending_notifications:
-            liker = notification["liker_info"]
-            if liker["username"]:
-                likers_info.append(f"• @{liker['username']} ({liker['first_name']})")
-            else:
-                likers_info.append(f"• Пользователь {liker['first_name']} (ID: {liker['user_id']})")
-        
+            notifications_by_dream.setdefault(notification["dream_id"], []).append(notification)
+
+        likers_info = []
+        for dream_id, notifications in notifications_by_dream.items():
+            dream = await db.dream.get_dream_by_id(dream_id=dream_id)
+            if not dream:
+                continue
+            likers_info.append(f"**{dream.name}:**")
+            for notification in notifications:
+                liker = notification["liker_info"]
+                if liker["username"]:
+                    likers_info.append(f"• @{liker['username']} ({liker['first_name']})")
+                else:
+                    likers_info.append(f"• Пользователь {liker['first_name']} (ID: {liker['user_id']})")
+
+        if not likers_info:
+            await callback_query.answer("Желание не найдено")
+            return
+
         # Уведомление для автора
         notification_message = (
-            f"🌟 **Вот кто заинтересовался твоим желанием!** 🌟\n\n"
-            f"**Желание:** {dream.name}\n"
+            f"🌟 **Вот кто заинтересовался твоими желаниями!** 🌟\n\n"
             f"**Количество лайков:** {len(pending_notifications)}\n\n"
             "**Лайкнувшие пользователи:**\n" + "\n".join(likers_info) + "\n\n"
             "**💡 Что дальше?**\n"
@@ -1149,9 +1051,6 @@ async def share_contact_grouped_callback_handler(callback_query: CallbackQuery,
             parse_mode="MARKDOWN"
         )
         
-        # Очищаем уведомления
-        await redis_cache.clear_like_notifications(dream.user_id)
-        
         await callback_query.answer("Контакты отправлены!")
         
     except Exception as e:
@@ -1163,22 +1062,9 @@ async def share_contact_grouped_callback_handler(callback_query: CallbackQuery,
 async def not_share_contact_grouped_callback_handler(callback_query: CallbackQuery, db, redis_cache=None):
     """Handle grouped not share contact callback."""
     try:
-        # Парсим callback данные: "not_share_contact_grouped {liker_username} {dream_username} {chat_id} {dream_id}"
-        data_parts = callback_query.data.split(' ')
-        if len(data_parts) < 5:
-            await callback_query.answer("Недостаточно данных для обработки")
-            return
-            
-        liker_username_id, dream_username_id, chat_id, dream_id = data_parts[1:5]
-        dream = await db.dream.get_dream_by_id(dream_id=dream_id)
-        
-        if not dream:
-            await callback_query.answer("Желание не найдено")
-            return
-        
-        # Просто очищаем уведомления
+        # Просто очищаем дайджест автора
         if redis_cache:
-            await redis_cache.clear_like_notifications(dream.user_id)
+            await redis_cache.clear_like_notifications(callback_query.from_user.id)
         
         await callback_query.message.edit_text(
             "👍 **Понятно!** 👍\n\n"
@@ -1199,7 +1085,7 @@ async def not_share_contact_grouped_callback_handler(callback_query: CallbackQue
 
 
 @dreams_router.callback_query(lambda c: c.data == "like_dream")
-async def like_dream_callback_handler(callback_query: CallbackQuery, db, redis_cache=None):
+async def like_dream_callback_handler(callback_query: CallbackQuery, db, feed, progress_buffer, redis_cache=None):
     """Handle like dream button press."""
     try:
         user_id = callback_query.from_user.id
@@ -1238,9 +1124,8 @@ async def like_dream_callback_handler(callback_query: CallbackQuery, db, redis_c
             await callback_query.answer("Требуется регистрация")
             return
         
-        # Получаем текущее желание других пользователей из offset
-        offset = await redis_cache.get_user_offset(user_id) if redis_cache else 0
-        dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset)
+        # Получаем текущее желание других пользователей из ленты
+        dream = await feed.current(user_id, db)
         
         if not dream:
             await callback_query.answer("Желание не найдено или больше нет доступных желаний")
@@ -1266,27 +1151,27 @@ async def like_dream_callback_handler(callback_query: CallbackQuery, db, redis_c
         # Добавляем очки автору желания
         if author_id:
             try:
-                await db.progress.increment_likes_received(author_id, 5)
+                await progress_buffer.add(author_id, 'total_likes_received', 5)
                 
                 # Проверяем достижение "Популярный мечтатель" (25 лайков)
-                author_progress = await db.progress.get_user_progress(author_id)
+                author_progress = await progress_buffer.get_progress(author_id, db)
                 if author_progress and author_progress.total_likes_received >= 25:
                     if not await db.achievements.is_achievement_unlocked(author_id, "popular_dreamer"):
                         await db.achievements.unlock_achievement(author_id, "popular_dreamer", 75)
-                        await db.progress.increment_likes_received(author_id, 75)  # Дополнительные очки за достижение
+                        await progress_buffer.add(author_id, 'total_likes_received', 75)  # Дополнительные очки за достижение
             except Exception as e:
                 logging.warning(f"Could not update achievements for user {author_id}: {e}")
         
         # Добавляем очки тому, кто ставит лайк
         try:
-            await db.progress.increment_likes_given(user_id, 2)
+            await progress_buffer.add(user_id, 'total_likes_given', 2)
             
             # Проверяем достижение "Общительная бабочка" (100 лайков)
-            user_progress = await db.progress.get_user_progress(user_id)
+            user_progress = await progress_buffer.get_progress(user_id, db)
             if user_progress and user_progress.total_likes_given >= 100:
                 if not await db.achievements.is_achievement_unlocked(user_id, "social_butterfly"):
                     await db.achievements.unlock_achievement(user_id, "social_butterfly", 60)
-                    await db.progress.increment_likes_given(user_id, 60)  # Дополнительные очки за достижение
+                    await progress_buffer.add(user_id, 'total_likes_given', 60)  # Дополнительные очки за достижение
         except Exception as e:
             logging.warning(f"Could not update achievements for user {user_id}: {e}")
         
@@ -1300,28 +1185,14 @@ async def like_dream_callback_handler(callback_query: CallbackQuery, db, redis_c
             }
             
             if redis_cache:
-                # Добавляем уведомление в очередь для группировки
+                # Дайджест отправит фоновый обработчик, когда лайки перестанут поступать
                 await redis_cache.add_like_notification(author_id, dream.id, liker_info)
-                
-                # Проверяем, есть ли уже ожидающие уведомления
-                pending_notifications = await redis_cache.get_pending_like_notifications(author_id)
-                
-                # Если это первое уведомление, отправляем группированное сообщение
-                if len(pending_notifications) == 1:
-                    await send_grouped_like_notification(author_id, dream, pending_notifications, callback_query.bot, redis_cache)
             else:
                 # Если Redis недоступен, отправляем обычное уведомление
                 await send_single_like_notification(author_id, dream, callback_query)
         
-        # Увеличиваем offset для следующего желания
-        if redis_cache:
-            new_offset = await redis_cache.increment_user_offset(user_id)
-            logging.info(f"User {user_id} offset incremented to {new_offset}")
-            # Используем новый offset для получения следующего желания других пользователей
-            next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=new_offset)
-        else:
-            # Если Redis недоступен, используем старый offset + 1
-            next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset + 1)
+        # Переходим к следующему желанию в ленте
+        next_dream = await feed.advance(user_id, db, seen_id=dream.id)
         
         # Если следующее желание не найдено, показываем сообщение
         if not next_dream:
@@ -1365,7 +1236,7 @@ async def like_dream_callback_handler(callback_query: CallbackQuery, db, redis_c
 
 
 @dreams_router.callback_query(lambda c: c.data == "dislike_dream")
-async def dislike_dream_callback_handler(callback_query: CallbackQuery, db, redis_cache=None):
+async def dislike_dream_callback_handler(callback_query: CallbackQuery, db, feed, redis_cache=None):
     """Handle dislike dream button press."""
     try:
         user_id = callback_query.from_user.id
@@ -1404,9 +1275,8 @@ async def dislike_dream_callback_handler(callback_query: CallbackQuery, db, redi
             await callback_query.answer("Требуется регистрация")
             return
         
-        # Получаем текущее желание других пользователей из offset
-        offset = await redis_cache.get_user_offset(user_id) if redis_cache else 0
-        dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset)
+        # Получаем текущее желание других пользователей из ленты
+        dream = await feed.current(user_id, db)
         
         if not dream:
             await callback_query.answer("Желание не найдено или больше нет доступных желаний")
@@ -1429,15 +1299,8 @@ async def dislike_dream_callback_handler(callback_query: CallbackQuery, db, redi
             except Exception as e:
                 logging.error(f"Error creating dislike record: {e}")
         
-        # Увеличиваем offset для следующего желания
-        if redis_cache:
-            new_offset = await redis_cache.increment_user_offset(user_id)
-            logging.info(f"User {user_id} offset incremented to {new_offset}")
-            # Используем новый offset для получения следующего желания других пользователей
-            next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=new_offset)
-        else:
-            # Если Redis недоступен, используем старый offset + 1
-            next_dream = await db.dream.get_dream_excluding_user(user_id=user_id, offset=offset + 1)
+        # Переходим к следующему желанию в ленте
+        next_dream = await feed.advance(user_id, db, seen_id=dream.id)
         
         # Если следующее желание не найдено, показываем сообщение
         if not next_dream:
@@ -1547,16 +1410,13 @@ async def create_dream_callback_handler(callback_query: CallbackQuery, state: FS
 
 
 @dreams_router.callback_query(lambda c: c.data == "retry_dreams")
-async def retry_dreams_callback_handler(callback_query: CallbackQuery, db, redis_cache=None):
+async def retry_dreams_callback_handler(callback_query: CallbackQuery, db, feed, redis_cache=None):
     """Handle retry dreams button press."""
     try:
         user_id = callback_query.from_user.id
         
-        # Сбрасываем offset и показываем первое желание
-        if redis_cache:
-            await redis_cache.set_user_offset(user_id, 0)
-        
-        dream = await db.dream.get_dream(user_id=user_id, offset=0)
+        # Начинаем ленту заново и показываем первое желание
+        dream = await feed.reset(user_id, db)
         await dreams_view_func(dream=dream, message=callback_query.message, db=db, user=await db.user.user_register_check(active_user_id=user_id))
         
         await callback_query.answer("Начинаем сначала! 🔄")
@@ -1666,7 +1526,7 @@ async def create_without_image_handler(callback_query: CallbackQuery, state: FSM
         await db.dream.new(
             user_id=callback_query.from_user.id,
             username=callback_query.from_user.username,
-            image=None,
+            image_hash=None,
             name=data.get('name', ''),
             description=description,
             category=category
@@ -14,6 +14,7 @@ from src.bot.structures.keyboards.dreams import (
 )
 from src.bot.structures.fsm.register import ChangeProfileName
 from src.bot.structures.keyboards.menu import MENU_KEYBOARD, ADDITIONAL_FEATURES_MARKUP
+from src.bot.structures.media import save_dream_photo, send_dream_photo
 
 
 @myprofile_router.message(F.text.lower() == "отмена")
@@ -41,9 +42,7 @@ async def dream_change_name_handler(message: types.Message, state: FSMContext):
 async def edit_dream_name_handler(message: types.Message, state: FSMContext, db):
     new_name = message.text
 
-    user = await db.user.get_user_by_id(message.from_user.id)
-    user.name = new_name
-    await db.session.commit()
+    await db.user.update_name(message.from_user.id, new_name)
 
     await state.clear()
 
@@ -70,13 +69,12 @@ async def mydream_handler(message: types.Message, db):
             text = (f"\n*Желание №{ind + 1}*\n\n"
                     f"*Тема*: {dream.name}\n"
                     f"*Описание*: {dream.description}\n\n")
-            if dream.image:
-                await message.bot.send_photo(message.chat.id,
-                                             types.BufferedInputFile(dream.image,
-                                                                     filename=f"user_photo_{dream.id}.png"),
-                                             caption=text,
-                                             reply_markup=reply_markup,
-                                             parse_mode='MARKDOWN')
+            if dream.image_hash:
+                await send_dream_photo(message.bot, message.chat.id, dream, db,
+                                       thumbnail=True,
+                                       caption=text,
+                                       reply_markup=reply_markup,
+                                       parse_mode='MARKDOWN')
             else:
                 await message.answer(text, reply_markup=reply_markup, parse_mode='MARKDOWN')
 
@@ -145,33 +143,27 @@ async def edit_dream_description_handler(message: types.Message, state: FSMConte
 
 
 @myprofile_router.message(DreamEditGroup.description)
-async def edit_user_dream_handler(message: types.Message, state: FSMContext, db):
+async def edit_user_dream_handler(message: types.Message, state: FSMContext, db, downloader, image_processor):
     try:
         data = await state.get_data()
         dream_id = int(data.get('dream_id'))
         name = data.get('name')
         description = message.text
         image_data = data.get('image')
-        image_content = None
-
-        if image_data:
-            photo = image_data[-1]
-            photo_file = await message.bot.get_file(photo.file_id)
-            photo_url = photo_file.file_path
-            request_url = f"https://api.telegram.org/file/bot{getenv('BOT_TOKEN')}/{photo_url}"
-            response = requests.get(request_url)
-
-            if response.status_code == 200:
-                image_content = response.content
-            else:
-                raise Exception("Failed to fetch image content")
 
         dream = await db.dream.get_dream_by_id(dream_id)
+        old_image_hash = dream.image_hash
         dream.name = name
         dream.description = description
-        dream.image = image_content if image_data else None
+        dream.image_hash = (
+            await save_dream_photo(message.bot, image_data[-1], db, downloader, image_processor)
+            if image_data else None
+        )
+        # Прежнее изображение удаляется, только если им больше не пользуются другие желания
+        await db.session.flush()
+        await db.media.release(old_image_hash)
 
-        await db.session.commit()
+        await db.dream.commit()
         await state.clear()
 
         await message.answer(
@@ -191,8 +183,11 @@ async def myprofile_delete_dream_callback_handler(callback_query: types.Callback
         dream = await db.dream.get_dream_by_id(dream_id)
 
         if dream:
+            image_hash = dream.image_hash
             await db.session.delete(dream)
-            await db.session.commit()
+            await db.session.flush()
+            await db.media.release(image_hash)
+            await db.dream.commit()
             await callback_query.message.answer("*Желание успешно удалено*", parse_mode='MARKDOWN')
         else:
             await callback_query.message.answer("*Не могу найти желание :(*", parse_mode='MARKDOWN')
@@ -205,14 +200,12 @@ async def myprofile_delete_dream_callback_handler(callback_query: types.Callback
 @myprofile_router.message(F.text.lower() == 'профиль')
 @myprofile_router.message(F.text == '👤 Профиль')
 @myprofile_router.message(F.text == '👤 Профиль')
-async def profile_handler(message: types.Message, db):
+async def profile_handler(message: types.Message, db, progress_buffer):
     user = await db.user.get_user_by_id(message.from_user.id)
     user_dreams = await db.dream.get_dreams_of_user(user_id=message.from_user.id)
     
-    # Получаем статистику из прогресса
-    user_progress = await db.progress.get_user_progress(message.from_user.id)
-    if not user_progress:
-        user_progress = await db.progress.create_user_progress(message.from_user.id)
+    # Получаем статистику из прогресса вместе с еще не записанными счетчиками
+    user_progress = await progress_buffer.get_progress(message.from_user.id, db)
     
     total_dreams = user_progress.total_dreams
     total_likes = user_progress.total_likes_received
@@ -9,16 +9,22 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.pool import NullPool
 
 from src.bot.structures.data_structure import TransferData
+from src.db.cache import UserCache
 from src.db.database import Database
 
 
 class DatabaseMiddleware(BaseMiddleware):
     """This middleware throw a Database class to handler with connection pooling."""
 
-    def __init__(self, sessionmaker: async_sessionmaker[AsyncSession]):
-        """Initialize middleware with session maker."""
+    def __init__(self, sessionmaker: async_sessionmaker[AsyncSession], user_cache: UserCache | None = None):
+        """Initialize middleware with session maker.
+
+        :param sessionmaker: Session maker for every update
+        :param user_cache: (Optional) Cache of user profiles shared between updates
+        """
         super().__init__()
         self.sessionmaker = sessionmaker
+        self.user_cache = user_cache
 
     async def __call__(
         self,
@@ -26,11 +32,20 @@ class DatabaseMiddleware(BaseMiddleware):
         event: Message | CallbackQuery,
         data: TransferData,
     ) -> Any:
-        """This method calls every update with optimized session management."""
-        async with self.sessionmaker() as session:
-            data['db'] = Database(session)
-            try:
-                return await handler(event, data)
-            except Exception as e:
-                await session.rollback()
-                raise e
+        """This method calls every update with optimized session management.
+
+        The session is opened only when the handler touches the database.
+        Repositories only flush their changes, which are committed once
+        when the handler succeeds and rolled back otherwise.
+        """
+        db = Database(sessionmaker=self.sessionmaker, user_cache=self.user_cache, unit_of_work=True)
+        data['db'] = db
+        try:
+            result = await handler(event, data)
+            await db.commit()
+            return result
+        except Exception as e:
+            await db.rollback()
+            raise e
+        finally:
+            await db.close()
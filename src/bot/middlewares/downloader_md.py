@@ -0,0 +1,28 @@
+"""Downloader middleware used to inject shared file downloader in handlers."""
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+from src.bot.structures.data_structure import TransferData
+from src.bot.structures.downloader import FileDownloader
+
+
+class DownloaderMiddleware(BaseMiddleware):
+    """This middleware throw a shared FileDownloader to handlers."""
+
+    def __init__(self, downloader: FileDownloader):
+        """Initialize middleware with the downloader."""
+        super().__init__()
+        self.downloader = downloader
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: TransferData,
+    ) -> Any:
+        """Add file downloader to data."""
+        data['downloader'] = self.downloader
+        return await handler(event, data)
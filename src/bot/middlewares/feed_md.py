@@ -0,0 +1,28 @@
+"""Feed middleware used to inject prefetched dream feed in handlers."""
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+from src.bot.structures.data_structure import TransferData
+from src.bot.structures.feed import DreamFeed
+
+
+class FeedMiddleware(BaseMiddleware):
+    """This middleware throw a shared DreamFeed to handlers."""
+
+    def __init__(self, feed: DreamFeed):
+        """Initialize middleware with the feed."""
+        super().__init__()
+        self.feed = feed
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: TransferData,
+    ) -> Any:
+        """Add dream feed to data."""
+        data['feed'] = self.feed
+        return await handler(event, data)
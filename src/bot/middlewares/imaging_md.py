@@ -0,0 +1,28 @@
+"""Image processor middleware used to inject shared image processor in handlers."""
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+from src.bot.structures.data_structure import TransferData
+from src.bot.structures.imaging import ImageProcessor
+
+
+class ImageProcessorMiddleware(BaseMiddleware):
+    """This middleware throw a shared ImageProcessor to handlers."""
+
+    def __init__(self, image_processor: ImageProcessor):
+        """Initialize middleware with the image processor."""
+        super().__init__()
+        self.image_processor = image_processor
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: TransferData,
+    ) -> Any:
+        """Add image processor to data."""
+        data['image_processor'] = self.image_processor
+        return await handler(event, data)
@@ -0,0 +1,28 @@
+"""Progress middleware used to inject buffered progress counters in handlers."""
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+from src.bot.structures.data_structure import TransferData
+from src.bot.structures.progress import ProgressBuffer
+
+
+class ProgressMiddleware(BaseMiddleware):
+    """This middleware throw a shared ProgressBuffer to handlers."""
+
+    def __init__(self, progress_buffer: ProgressBuffer):
+        """Initialize middleware with the progress buffer."""
+        super().__init__()
+        self.progress_buffer = progress_buffer
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: TransferData,
+    ) -> Any:
+        """Add progress buffer to data."""
+        data['progress_buffer'] = self.progress_buffer
+        return await handler(event, data)
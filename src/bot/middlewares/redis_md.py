@@ -17,6 +17,8 @@ class RedisMiddleware(BaseMiddleware):
         """Initialize Redis middleware."""
         super().__init__()
         self.redis_client = redis_client
+        # Lua-скрипты регистрируются один раз, а не на каждый апдейт
+        self.redis_cache = RedisCache(redis_client)
 
     async def __call__(
         self,
@@ -24,11 +26,6 @@ class RedisMiddleware(BaseMiddleware):
         event: Message | CallbackQuery,
         data: TransferData,
     ) -> Any:
-        """Initialize Redis cache for each update."""
-        # Инициализируем Redis кэш
-        redis_cache = RedisCache(self.redis_client)
-        data['redis_cache'] = redis_cache
-        
-
-        
+        """Add Redis cache to data."""
+        data['redis_cache'] = self.redis_cache
         return await handler(event, data)
@@ -0,0 +1,193 @@
+"""Resumable broadcasts to all users."""
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.bot.structures.rate_limiter import Priority, send_priority
+from src.configuration import conf
+from src.db.database import Database
+
+
+# Продлевает блокировку, только если она все еще принадлежит этому запуску.
+REFRESH_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+return 0
+"""
+
+# Снимает блокировку, только если она все еще принадлежит этому запуску.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class BroadcastStats:
+    """Delivery stats of one broadcast run."""
+
+    run_id: str
+    sent: int = 0
+    blocked: int = 0
+    """ Users who blocked the bot """
+    failed: int = 0
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @classmethod
+    def from_redis(cls, run_id: str, raw: dict) -> 'BroadcastStats':
+        """Build stats from the Redis hash."""
+        data = {key.decode(): value.decode() for key, value in raw.items()}
+        return cls(
+            run_id=run_id,
+            sent=int(data.get('sent', 0)),
+            blocked=int(data.get('blocked', 0)),
+            failed=int(data.get('failed', 0)),
+            started_at=float(data['started_at']) if 'started_at' in data else None,
+            finished_at=float(data['finished_at']) if 'finished_at' in data else None,
+        )
+
+
+class Broadcast:
+    """Sends a message to every user, continuing after a crash.
+
+    User ids are streamed from the database with a server-side cursor in
+    ascending order. After every batch of sends the last user id is saved
+    in ``broadcast:{name}:current``, so a restarted run continues after it
+    and at most one batch is sent twice. Delivery counters of every run are
+    kept in ``broadcast:{name}:stats:{run_id}``.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        redis_client: Redis,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        chunk_size: int = conf.broadcast.chunk_size,
+        concurrency: int = conf.broadcast.concurrency,
+        lock_ttl: int = conf.broadcast.lock_ttl,
+        stats_ttl: int = conf.broadcast.stats_ttl,
+    ):
+        """Initialize broadcast.
+
+        :param bot: Bot which sends messages, the same for the whole run
+        :param redis_client: Redis client for checkpoints and stats
+        :param sessionmaker: Session maker for streaming users
+        :param chunk_size: How many user ids are fetched from the cursor at once
+        :param concurrency: How many messages are sent at once, progress is saved after each batch
+        :param lock_ttl: Seconds after which the run of a crashed process may be taken over
+        :param stats_ttl: How long stats of finished runs are kept, in seconds
+        """
+        self.bot = bot
+        self.redis = redis_client
+        self.sessionmaker = sessionmaker
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.lock_ttl = lock_ttl
+        self.stats_ttl = stats_ttl
+        self._refresh_lock_script = redis_client.register_script(REFRESH_LOCK_SCRIPT)
+        self._release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+
+    @staticmethod
+    def _key(name: str, suffix: str) -> str:
+        return f"broadcast:{name}:{suffix}"
+
+    async def get_stats(self, name: str, run_id: str) -> BroadcastStats:
+        """Get delivery stats of the broadcast run."""
+        return BroadcastStats.from_redis(run_id, await self.redis.hgetall(self._key(name, f"stats:{run_id}")))
+
+    async def get_runs(self, name: str, limit: int = 10) -> list[BroadcastStats]:
+        """Get stats of the latest runs of the broadcast, newest first."""
+        run_ids = await self.redis.lrange(self._key(name, 'runs'), 0, limit - 1)
+        return [await self.get_stats(name, run_id.decode()) for run_id in run_ids]
+
+    async def _start_or_resume(self, name: str) -> tuple[str, int]:
+        current = await self.redis.hgetall(self._key(name, 'current'))
+        if current:
+            run_id, cursor = current[b'run_id'].decode(), int(current[b'cursor'])
+            logging.info(f"Resuming broadcast {name} run {run_id} after user {cursor}")
+            return run_id, cursor
+
+        run_id = str(int(time.time()))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(name, 'current'), mapping={'run_id': run_id, 'cursor': 0})
+            pipe.hset(self._key(name, f"stats:{run_id}"), 'started_at', time.time())
+            pipe.lpush(self._key(name, 'runs'), run_id)
+            pipe.ltrim(self._key(name, 'runs'), 0, 99)
+            await pipe.execute()
+        return run_id, 0
+
+    async def _send_batch(
+        self, user_ids: list[int], send: Callable[[Bot, int], Awaitable[None]]
+    ) -> dict[str, int]:
+        results = await asyncio.gather(*(send(self.bot, user_id) for user_id in user_ids), return_exceptions=True)
+        counters = {'sent': 0, 'blocked': 0, 'failed': 0}
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, TelegramForbiddenError):
+                counters['blocked'] += 1
+            elif isinstance(result, Exception):
+                counters['failed'] += 1
+                logging.error(f"Error sending broadcast to {user_id}: {result}")
+            else:
+                counters['sent'] += 1
+        return counters
+
+    async def run(self, name: str, send: Callable[[Bot, int], Awaitable[None]]) -> BroadcastStats | None:
+        """Send broadcast to all users or continue the interrupted run.
+
+        :param name: Name of the broadcast, one run of a name goes at a time
+        :param send: Coroutine function which sends the message to one user,
+        ``TelegramForbiddenError`` is counted as blocked
+        :return: Stats of the run or None if it's already running in another process.
+        """
+        lock_key = self._key(name, 'lock')
+        # Уникальный токен не дает снять блокировку, которую после истечения TTL взял другой процесс
+        lock_token = uuid.uuid4().hex
+        if not await self.redis.set(lock_key, lock_token, nx=True, ex=self.lock_ttl):
+            logging.info(f"Broadcast {name} is already running")
+            return None
+
+        try:
+            run_id, cursor = await self._start_or_resume(name)
+            stats_key = self._key(name, f"stats:{run_id}")
+
+            # Рассылка использует только свободную часть лимита, чтобы не замедлять ответы пользователям
+            with send_priority(Priority.BROADCAST):
+                async with self.sessionmaker() as session:
+                    db = Database(session)
+                    async for chunk in db.user.stream_user_ids(after_id=cursor, chunk_size=self.chunk_size):
+                        for i in range(0, len(chunk), self.concurrency):
+                            batch = list(chunk[i:i + self.concurrency])
+                            counters = await self._send_batch(batch, send)
+
+                            async with self.redis.pipeline(transaction=True) as pipe:
+                                for counter, value in counters.items():
+                                    pipe.hincrby(stats_key, counter, value)
+                                pipe.hset(self._key(name, 'current'), 'cursor', batch[-1])
+                                await self._refresh_lock_script(
+                                    keys=[lock_key], args=[lock_token, self.lock_ttl], client=pipe
+                                )
+                                await pipe.execute()
+
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(stats_key, 'finished_at', time.time())
+                pipe.expire(stats_key, self.stats_ttl)
+                pipe.delete(self._key(name, 'current'))
+                await pipe.execute()
+
+            stats = await self.get_stats(name, run_id)
+            logging.info(f"Broadcast {name} finished: {stats}")
+            return stats
+        finally:
+            await self._release_lock_script(keys=[lock_key], args=[lock_token])
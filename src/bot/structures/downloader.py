@@ -0,0 +1,131 @@
+"""Streaming ingest of Telegram files."""
+import hashlib
+import tempfile
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.types import Downloadable
+
+from src.configuration import conf
+
+
+class DownloadError(Exception):
+    """File could not be downloaded."""
+
+
+@dataclass
+class DownloadedFile:
+    """Downloaded file content with its hash."""
+
+    data: bytes
+    sha256: str
+    size: int
+
+
+class _HashingSink:
+    """Writable destination for ``Bot.download`` with a bounded buffer.
+
+    Hashes chunks as they arrive and aborts the download as soon as it grows
+    over ``max_size``. When the size is known in advance the content is
+    written into one preallocated buffer, otherwise chunks are spooled to a
+    temporary file above ``spool_threshold``.
+    """
+
+    def __init__(self, max_size: int, spool_threshold: int, expected_size: int | None = None):
+        self.max_size = max_size
+        self.size = 0
+        self.hash = hashlib.sha256()
+        if expected_size and expected_size <= max_size:
+            self._buffer: bytearray | None = bytearray(expected_size)
+            self._view = memoryview(self._buffer)
+            self._spool = None
+        else:
+            self._buffer = None
+            self._spool = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+
+    def write(self, chunk: bytes) -> int:
+        end = self.size + len(chunk)
+        if end > self.max_size:
+            raise DownloadError(f"File is larger than {self.max_size} bytes")
+        self.hash.update(chunk)
+
+        if self._buffer is not None and end > len(self._buffer):
+            # Telegram сообщил неверный размер - переносим уже полученное во временный файл
+            self._spool = tempfile.SpooledTemporaryFile(max_size=end)
+            self._spool.write(self._view[:self.size])
+            self._view.release()
+            self._buffer = None
+
+        if self._buffer is not None:
+            self._view[self.size:end] = chunk
+        else:
+            self._spool.write(chunk)
+        self.size = end
+        return len(chunk)
+
+    def flush(self) -> None:
+        pass
+
+    def result(self) -> DownloadedFile:
+        if self._buffer is not None:
+            data = bytes(self._view[:self.size])
+            self._view.release()
+        else:
+            self._spool.seek(0)
+            data = self._spool.read()
+            self._spool.close()
+        return DownloadedFile(data=data, sha256=self.hash.hexdigest(), size=self.size)
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+
+
+class FileDownloader:
+    """Downloads Telegram files in chunks with bounded memory.
+
+    Files are streamed by ``Bot.download`` over the bot's long-lived HTTP
+    session into a bounded buffer, and the SHA-256 of the content is computed
+    on the fly.
+    """
+
+    def __init__(
+        self,
+        timeout: int = conf.download.timeout,
+        max_size: int = conf.download.max_size,
+        chunk_size: int = conf.download.chunk_size,
+        spool_threshold: int = conf.download.spool_threshold,
+    ):
+        """Initialize downloader.
+
+        :param timeout: Total timeout of one download in seconds
+        :param max_size: Max size of a downloaded file in bytes
+        :param chunk_size: Size of the chunks the file is read by
+        :param spool_threshold: Files of unknown size larger than this are
+        buffered in a temporary file instead of memory
+        """
+        self.timeout = timeout
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.spool_threshold = spool_threshold
+
+    async def download(self, bot: Bot, file: Downloadable) -> DownloadedFile:
+        """Download Telegram file.
+
+        :param bot: Bot which received the file
+        :param file: Photo, document or other object with ``file_id``
+        :return: File content with its SHA-256
+        :raises DownloadError: If the file is too large
+        """
+        expected_size = getattr(file, 'file_size', None)
+        if expected_size and expected_size > self.max_size:
+            raise DownloadError(f"File is larger than {self.max_size} bytes")
+
+        sink = _HashingSink(self.max_size, self.spool_threshold, expected_size)
+        try:
+            await bot.download(
+                file, destination=sink, timeout=self.timeout, chunk_size=self.chunk_size, seek=False
+            )
+            return sink.result()
+        finally:
+            sink.close()
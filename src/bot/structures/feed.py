@@ -0,0 +1,358 @@
+"""Prefetched per-user dream feed stored in Redis."""
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import asdict, dataclass
+
+import emoji
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.configuration import conf
+from src.db.database import Database
+
+
+# Отмечает оцененное желание и снимает его с головы очереди, только если там именно оно.
+# Повторное нажатие или устаревшая кнопка не должны пропускать желание, которое пользователь не видел.
+ADVANCE_SCRIPT = """
+if ARGV[1] ~= '' then
+    redis.call('SETBIT', KEYS[2], tonumber(ARGV[1]), 1)
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+    local head = redis.call('LINDEX', KEYS[1], 0)
+    if head and tostring(cjson.decode(head).id) == ARGV[1] then
+        redis.call('LPOP', KEYS[1])
+    end
+else
+    redis.call('LPOP', KEYS[1])
+end
+return {redis.call('LINDEX', KEYS[1], 0), redis.call('LLEN', KEYS[1])}
+"""
+
+# Продлевает блокировку, только если она все еще принадлежит тому, кто ее взял.
+REFRESH_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+return 0
+"""
+
+# Добавляет карточки и сдвигает курсор, только если блокировка все еще принадлежит пополнению.
+# Пополнение, у которого истекла блокировка, не должно дописать устаревшие карточки.
+# KEYS: блокировка, очередь, курсор. ARGV: токен, TTL, курсор, карточки.
+PUSH_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if #ARGV > 3 then
+    redis.call('RPUSH', KEYS[2], unpack(ARGV, 4))
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+end
+redis.call('SET', KEYS[3], ARGV[3], 'EX', tonumber(ARGV[2]))
+return 1
+"""
+
+# Снимает блокировку, только если она все еще принадлежит тому, кто ее взял.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class DreamCard:
+    """Rendered dream card kept in the user's feed."""
+
+    id: int
+    user_id: int
+    username: str | None
+    name: str | None
+    text: str
+    has_image: bool = False
+    image_hash: str | None = None
+
+
+def render_dream_card(dream) -> DreamCard:
+    """Build a feed card from a row of ``DreamRepo.get_dream_cards_after``."""
+    user_gender = emoji.emojize(':man:') if dream.author_gender == 'Мужчина' else emoji.emojize(':woman:')
+    formatted_date = dream.created_at.strftime("%d.%m.%Y")
+
+    text = (
+        f"\n*Тема*: {dream.name}\n"
+        f"*Описание*: {dream.description}\n"
+        f"*Категория*: {dream.category if dream.category else 'Не указана'}\n"
+        f"*Город*: {dream.author_country or 'Другой'}\n"
+        f"*Автор*: {dream.author_name or 'Анонимный'} {user_gender}\n"
+        f"*Дата создания*: {formatted_date}"
+    )
+
+    return DreamCard(
+        id=dream.id,
+        user_id=dream.user_id,
+        username=dream.username,
+        name=dream.name,
+        text=text,
+        has_image=dream.image_hash is not None,
+        image_hash=dream.image_hash,
+    )
+
+
+class _LockLost(Exception):
+    """Feed lock expired or was taken over while the feed was being filled."""
+
+
+class DreamFeed:
+    """Per-user queue of prefetched dream cards.
+
+    The head of ``feed:{user_id}`` is the dream the user is looking at now,
+    the rest of the list are the next dreams. Cards are loaded in one batched
+    query and the queue is refilled in the background when it runs low, so a
+    swipe usually costs a single Redis round-trip.
+
+    Judged dreams are remembered in the ``feed_seen:{user_id}`` bitmap (one
+    bit per dream id) and never get into the feed again, even after the feed
+    is started from the beginning. Runs of judged dreams are skipped by ids
+    only, at most ``max_scan_batches`` queries in the request path, and a
+    longer scan continues in the background under the same lock.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        batch_size: int = conf.feed.batch_size,
+        refill_threshold: int = conf.feed.refill_threshold,
+        ttl: int = conf.feed.ttl,
+        seen_ttl: int = conf.feed.seen_ttl,
+        scan_batch_size: int = conf.feed.scan_batch_size,
+        max_scan_batches: int = conf.feed.max_scan_batches,
+        lock_ttl: int = conf.feed.lock_ttl,
+    ):
+        """Initialize feed.
+
+        :param redis_client: Redis client where feeds are stored
+        :param sessionmaker: Session maker for background refills
+        :param batch_size: How many dreams are loaded per query
+        :param refill_threshold: Refill when fewer dreams are left in the queue
+        :param ttl: Time-To-Live of the feed keys in seconds
+        :param seen_ttl: Time-To-Live of the judged dreams bitmap in seconds
+        :param scan_batch_size: How many dream ids are checked per query when
+        skipping judged dreams
+        :param max_scan_batches: How many scan queries one fill makes before
+        it continues in the background
+        :param lock_ttl: Time-To-Live of the fill lock in seconds, it is
+        extended after every scan query
+        """
+        self.redis = redis_client
+        self.sessionmaker = sessionmaker
+        self.batch_size = batch_size
+        self.refill_threshold = refill_threshold
+        self.ttl = ttl
+        self.seen_ttl = seen_ttl
+        self.scan_batch_size = scan_batch_size
+        self.max_scan_batches = max_scan_batches
+        self.lock_ttl = lock_ttl
+        self._tasks: set[asyncio.Task] = set()
+        self._advance_script = redis_client.register_script(ADVANCE_SCRIPT)
+        self._refresh_lock_script = redis_client.register_script(REFRESH_LOCK_SCRIPT)
+        self._push_script = redis_client.register_script(PUSH_SCRIPT)
+        self._release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+
+    @staticmethod
+    def _feed_key(user_id: int) -> str:
+        return f"feed:{user_id}"
+
+    @staticmethod
+    def _cursor_key(user_id: int) -> str:
+        """Key with id of the last dream loaded into the feed."""
+        return f"feed_cursor:{user_id}"
+
+    @staticmethod
+    def _seen_key(user_id: int) -> str:
+        return f"feed_seen:{user_id}"
+
+    @staticmethod
+    def _lock_key(user_id: int) -> str:
+        return f"feed_lock:{user_id}"
+
+    @staticmethod
+    def _load(raw) -> DreamCard | None:
+        if not raw:
+            return None
+        card = json.loads(raw)
+        # В картах, сохраненных до обновления, еще лежит file_id изображения
+        card.pop('image_file_id', None)
+        return DreamCard(**card)
+
+    async def current(self, user_id: int, db: Database) -> DreamCard | None:
+        """Get the dream the user is looking at now."""
+        raw = await self.redis.lindex(self._feed_key(user_id), 0)
+        if raw is None:
+            # Очередь пуста или истекла - заполняем ее сразу
+            await self._fill_now(user_id, db)
+            raw = await self.redis.lindex(self._feed_key(user_id), 0)
+        return self._load(raw)
+
+    async def advance(self, user_id: int, db: Database, seen_id: int | None = None) -> DreamCard | None:
+        """Drop the current dream and get the next one.
+
+        :param seen_id: (Optional) Id of the judged dream to exclude from
+        the feed from now on
+        """
+        key = self._feed_key(user_id)
+        raw, length = await self._advance_script(
+            keys=[key, self._seen_key(user_id)],
+            args=['' if seen_id is None else seen_id, self.seen_ttl],
+        )
+
+        if raw is None:
+            await self._fill_now(user_id, db)
+            raw = await self.redis.lindex(key, 0)
+        elif length <= self.refill_threshold:
+            self._schedule_refill(user_id)
+
+        return self._load(raw)
+
+    async def reset(self, user_id: int, db: Database) -> DreamCard | None:
+        """Start the feed from the beginning and get the first dream.
+
+        A fill which is running right now loses its lock, so it can't write
+        old cards after the reset.
+        """
+        token = uuid.uuid4().hex
+        # Перехватываем блокировку вместо ожидания: запись карточек проверяет владельца блокировки
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._lock_key(user_id), token, ex=self.lock_ttl)
+            pipe.delete(self._feed_key(user_id), self._cursor_key(user_id))
+            await pipe.execute()
+        await self._release_lock(user_id, token)
+        return await self.current(user_id, db)
+
+    async def _acquire_lock(self, user_id: int) -> str | None:
+        """Take the feed lock.
+
+        :return: Token of the lock or None if it's taken by someone else.
+        """
+        token = uuid.uuid4().hex
+        if await self.redis.set(self._lock_key(user_id), token, nx=True, ex=self.lock_ttl):
+            return token
+        return None
+
+    async def _refresh_lock(self, user_id: int, token: str) -> None:
+        if not await self._refresh_lock_script(keys=[self._lock_key(user_id)], args=[token, self.lock_ttl]):
+            raise _LockLost()
+
+    async def _release_lock(self, user_id: int, token: str) -> None:
+        await self._release_lock_script(keys=[self._lock_key(user_id)], args=[token])
+
+    async def _push(self, user_id: int, token: str, cursor: int, cards: list[str]) -> None:
+        if not await self._push_script(
+            keys=[self._lock_key(user_id), self._feed_key(user_id), self._cursor_key(user_id)],
+            args=[token, self.ttl, cursor, *cards],
+        ):
+            raise _LockLost()
+
+    async def _is_seen(self, user_id: int, dream_ids) -> list[int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for dream_id in dream_ids:
+                pipe.getbit(self._seen_key(user_id), dream_id)
+            return await pipe.execute()
+
+    async def _filter_seen(self, user_id: int, dreams):
+        """Drop dreams which the user has already judged."""
+        seen = await self._is_seen(user_id, [dream.id for dream in dreams])
+        return [dream for dream, is_seen in zip(dreams, seen) if not is_seen]
+
+    async def _skip_seen(self, user_id: int, db: Database, cursor: int, token: str) -> tuple[int, bool | None]:
+        """Move the cursor past dreams which the user has already judged.
+
+        :return: New cursor and True if an unseen dream follows it, False if
+        there are no more dreams, None if the scan limit was reached first.
+        """
+        for _ in range(self.max_scan_batches):
+            dream_ids = await db.dream.get_dream_ids_after(user_id, after_id=cursor, limit=self.scan_batch_size)
+            for dream_id, is_seen in zip(dream_ids, await self._is_seen(user_id, dream_ids)):
+                if not is_seen:
+                    return cursor, True
+                cursor = dream_id
+            if len(dream_ids) < self.scan_batch_size:
+                return cursor, False
+            # Длинный просмотр не должен потерять блокировку
+            await self._refresh_lock(user_id, token)
+        return cursor, None
+
+    async def _fill(self, user_id: int, db: Database, token: str | None = None) -> int | None:
+        """Append the next batch of unseen cards to the feed.
+
+        Dreams the user has already judged are skipped by ids. If the scan
+        limit is reached first, the scan continues in the background.
+
+        :param token: (Optional) Token of the already taken feed lock
+        :return: Count of added cards, 0 if there are no more dreams, or None
+        if the feed is being filled by someone else right now.
+        """
+        if token is None:
+            token = await self._acquire_lock(user_id)
+            if token is None:
+                return None
+
+        try:
+            cursor = int(await self.redis.get(self._cursor_key(user_id)) or 0)
+            # Пропускаем уже оцененные желания, иначе после сброса более новые желания стали бы недоступны
+            cursor, found = await self._skip_seen(user_id, db, cursor, token)
+            dreams = []
+            if found:
+                batch = await db.dream.get_dream_cards_after(user_id, after_id=cursor, limit=self.batch_size)
+                if batch:
+                    cursor = batch[-1].id
+                    dreams = await self._filter_seen(user_id, batch)
+
+            cards = [json.dumps(asdict(render_dream_card(dream))) for dream in dreams]
+            await self._push(user_id, token, cursor, cards)
+            if cards or found is False:
+                return len(cards)
+
+            # Остаток просмотра продолжаем в фоне с той же блокировкой, чтобы не задерживать ответ
+            self._schedule_refill(user_id, token)
+            token = None
+            return None
+        except _LockLost:
+            logging.warning(f"Feed lock of user {user_id} was lost while filling the feed")
+            token = None
+            return None
+        finally:
+            if token is not None:
+                await self._release_lock(user_id, token)
+
+    async def _fill_now(self, user_id: int, db: Database) -> None:
+        """Fill the feed in the request path.
+
+        If the feed is being filled by a background refill or another process,
+        waits until it's done, at most for the lock TTL.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+        while not await self.redis.llen(self._feed_key(user_id)):
+            if await self._fill(user_id, db) is not None:
+                return
+            if loop.time() >= deadline:
+                logging.warning(f"Feed of user {user_id} is still being filled after {self.lock_ttl}s")
+                return
+            await asyncio.sleep(0.05)
+
+    def _schedule_refill(self, user_id: int, token: str | None = None) -> None:
+        task = asyncio.create_task(self._refill(user_id, token))
+        # Храним ссылку на задачу, чтобы ее не собрал сборщик мусора
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refill(self, user_id: int, token: str | None = None) -> None:
+        try:
+            async with self.sessionmaker() as session:
+                await self._fill(user_id, Database(session), token)
+        except Exception as e:
+            logging.error(f"Error refilling feed for user {user_id}: {e}")
+            if token is not None:
+                await self._release_lock(user_id, token)
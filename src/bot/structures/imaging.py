@@ -0,0 +1,109 @@
+"""Normalization of dream images in a process pool."""
+import asyncio
+import hashlib
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+from src.configuration import conf
+
+
+@dataclass
+class ProcessedImage:
+    """Feed-size image with its thumbnail."""
+
+    data: bytes
+    sha256: str
+    thumbnail: bytes | None = None
+
+
+def _encode(image: Image.Image, max_side: int, image_format: str, quality: int) -> bytes:
+    image = image.copy()
+    # thumbnail() только уменьшает и сохраняет пропорции
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def process_image(
+    data: bytes, max_side: int, thumbnail_side: int, image_format: str, quality: int
+) -> tuple[bytes, str, bytes]:
+    """Re-encode image to the feed size and make a thumbnail.
+
+    Runs in a worker process, so it must stay a module level function.
+
+    :return: Feed-size image, its hex SHA-256 and the thumbnail.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        # Учитываем поворот из EXIF и убираем прозрачность, которую JPEG не поддерживает
+        image = ImageOps.exif_transpose(source).convert('RGB')
+    feed = _encode(image, max_side, image_format, quality)
+    thumbnail = _encode(image, thumbnail_side, image_format, quality)
+    return feed, hashlib.sha256(feed).hexdigest(), thumbnail
+
+
+class ImageProcessor:
+    """Re-encodes dream images outside of the event loop.
+
+    Decoding, resizing and encoding are CPU-bound, so they run in a
+    ``ProcessPoolExecutor`` and the bot keeps handling updates meanwhile.
+    """
+
+    def __init__(
+        self,
+        workers: int = conf.media.workers,
+        max_side: int = conf.media.max_side,
+        thumbnail_side: int = conf.media.thumbnail_side,
+        image_format: str = conf.media.image_format,
+        quality: int = conf.media.quality,
+    ):
+        """Initialize processor.
+
+        :param workers: Count of worker processes
+        :param max_side: Max width and height of the feed-size image
+        :param thumbnail_side: Max width and height of the thumbnail
+        :param image_format: Pillow format of the output, JPEG or WEBP
+        :param quality: Encoder quality from 1 to 100
+        """
+        self.workers = workers
+        self.max_side = max_side
+        self.thumbnail_side = thumbnail_side
+        self.image_format = image_format
+        self.quality = quality
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Process pool, started on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def process(self, data: bytes, sha256: str | None = None) -> ProcessedImage:
+        """Get feed-size image and thumbnail.
+
+        If the image can't be decoded the original content is kept as is.
+
+        :param data: Downloaded image content
+        :param sha256: (Optional) Hex SHA-256 of the original content
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            feed, feed_sha256, thumbnail = await loop.run_in_executor(
+                self.executor, process_image,
+                data, self.max_side, self.thumbnail_side, self.image_format, self.quality,
+            )
+        except Exception as e:
+            logging.warning(f"Could not process image, storing original: {e}")
+            return ProcessedImage(data=data, sha256=sha256 or hashlib.sha256(data).hexdigest())
+        return ProcessedImage(data=feed, sha256=feed_sha256, thumbnail=thumbnail)
+
+    async def close(self) -> None:
+        """Stop worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
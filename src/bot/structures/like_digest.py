@@ -0,0 +1,91 @@
+"""Background sender of debounced like digests."""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.bot.structures.rate_limiter import Priority, send_priority
+from src.bot.structures.redis_cache import RedisCache
+from src.configuration import conf
+from src.db.database import Database
+
+
+class LikeDigestWorker:
+    """Sends authors one digest of likes after a quiet period.
+
+    Likes only add a notification in Redis (``RedisCache.add_like_notification``)
+    and schedule the author in the due sorted set, so the liker never waits
+    for ``send_message``. The worker periodically claims authors whose digest
+    is due and sends them what was accumulated.
+    """
+
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        send_digest: Callable[[Bot, Database, int, list], Awaitable[None]],
+        interval: float = conf.notification.digest_interval,
+        batch_size: int = conf.notification.digest_batch_size,
+    ):
+        """Initialize worker.
+
+        :param redis_cache: Redis cache with like notifications
+        :param sessionmaker: Session maker for loading dreams
+        :param send_digest: Coroutine function which sends digest to the author
+        :param interval: Seconds between checks of due digests
+        :param batch_size: How many authors are claimed at once
+        """
+        self.redis_cache = redis_cache
+        self.sessionmaker = sessionmaker
+        self.send_digest = send_digest
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    async def send_due(self, bot: Bot) -> int:
+        """Send digests of one batch of authors whose quiet period is over.
+
+        :return: Count of claimed authors.
+        """
+        author_ids = await self.redis_cache.pop_due_like_authors(self.batch_size)
+        if not author_ids:
+            return 0
+
+        async with self.sessionmaker() as session:
+            db = Database(session)
+            for author_id in author_ids:
+                try:
+                    notifications = await self.redis_cache.move_like_notifications_to_digest(author_id)
+                    if notifications:
+                        await self.send_digest(bot, db, author_id, notifications)
+                except Exception as e:
+                    logging.error(f"Error sending like digest to {author_id}: {e}")
+        return len(author_ids)
+
+    async def _run(self, bot: Bot) -> None:
+        # Дайджесты уступают ответам пользователям
+        with send_priority(Priority.NOTIFICATION):
+            await self._loop(bot)
+
+    async def _loop(self, bot: Bot) -> None:
+        while True:
+            try:
+                # Пока есть полные пачки, отправляем без паузы
+                while await self.send_due(bot) >= self.batch_size:
+                    pass
+            except Exception as e:
+                logging.error(f"Error in like digest worker: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self, bot: Bot) -> None:
+        """Start sending digests in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def stop(self) -> None:
+        """Stop sending digests, not sent ones stay in Redis."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,81 @@
+"""Helpers for sending dream images to Telegram."""
+import logging
+
+from aiogram import Bot, types
+from aiogram.exceptions import TelegramBadRequest
+
+from src.bot.structures.downloader import FileDownloader
+from src.bot.structures.imaging import ImageProcessor
+from src.db.database import Database
+
+
+async def save_dream_photo(
+    bot: Bot, photo: types.PhotoSize, db: Database, downloader: FileDownloader, image_processor: ImageProcessor
+) -> str:
+    """Store dream photo in the media store and add a reference to it.
+
+    A photo which was already uploaded (Telegram keeps one ``file_unique_id``
+    for the same file, also when it's forwarded by other users) is neither
+    downloaded nor processed again.
+
+    :param bot: Bot which received the photo
+    :param photo: Largest size of the received photo
+    :param db: Database with the media store
+    :param downloader: Downloader of Telegram files
+    :param image_processor: Processor which re-encodes the image
+    :return: Hex SHA-256 reference of the stored image.
+    """
+    sha256 = await db.media.acquire(photo.file_unique_id)
+    if sha256 is not None:
+        return sha256
+
+    downloaded = await downloader.download(bot, photo)
+    image = await image_processor.process(downloaded.data, downloaded.sha256)
+    # Одинаковые изображения хранятся один раз в размере для ленты вместе с миниатюрой
+    return await db.media.new(
+        image.data, sha256=image.sha256, thumbnail=image.thumbnail, file_unique_id=photo.file_unique_id
+    )
+
+
+async def send_dream_photo(
+    bot: Bot, chat_id: int, dream, db: Database, thumbnail: bool = False, **kwargs
+) -> types.Message:
+    """Send dream image by Telegram file_id, uploading bytes only if needed.
+
+    The file_id is looked up when sending, so dreams loaded before the image
+    was first uploaded don't upload it again.
+
+    :param bot: Bot instance which used for request
+    :param chat_id: Chat where photo is sent
+    :param dream: Dream or dream card with ``id`` and ``image_hash``
+    :param db: Database to load image bytes and store the new file_id
+    :param thumbnail: Send small preview instead of the feed-size image,
+    falls back to the image for media stored without a thumbnail
+    :param kwargs: Other send_photo arguments (caption, reply_markup, etc.)
+    :return: Sent message.
+    """
+    file_id = await db.media.get_file_id(dream.image_hash, thumbnail=thumbnail)
+    if file_id:
+        try:
+            return await bot.send_photo(chat_id, file_id, **kwargs)
+        except TelegramBadRequest as e:
+            logging.warning(f"Telegram rejected file_id of dream {dream.id}, uploading image again: {e}")
+
+    image = await db.media.get_thumbnail(dream.image_hash) if thumbnail else None
+    if image is None:
+        thumbnail = False
+        image = await db.media.get_data(dream.image_hash)
+    if image is None:
+        # Изображение уже удалено из хранилища - показываем желание без него
+        logging.warning(f"Image {dream.image_hash} of dream {dream.id} is missing, sending text only")
+        return await bot.send_message(chat_id, kwargs.pop('caption', None) or '', **kwargs)
+
+    sent_message = await bot.send_photo(
+        chat_id,
+        types.BufferedInputFile(image, filename=f"user_photo_{dream.id}.jpg"),
+        **kwargs
+    )
+
+    # Запоминаем file_id, чтобы в следующий раз не загружать изображение заново
+    await db.media.set_file_id(dream.image_hash, sent_message.photo[-1].file_id, thumbnail=thumbnail)
+    return sent_message
@@ -0,0 +1,164 @@
+"""Write-behind buffer of user progress counters stored in Redis."""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.configuration import conf
+from src.db.database import Database
+
+
+@dataclass
+class ProgressSnapshot:
+    """User progress with not yet flushed counters merged in."""
+
+    user_id: int
+    total_dreams: int = 0
+    total_likes_received: int = 0
+    total_dreams_viewed: int = 0
+    total_likes_given: int = 0
+    consecutive_days: int = 0
+    users_helped: int = 0
+    total_points: int = 0
+    last_activity_date: datetime | None = None
+
+
+class ProgressBuffer:
+    """Accumulates progress counters in Redis and flushes them in batches.
+
+    Every increment is a ``HINCRBY`` on the ``progress_delta:{user_id}`` hash
+    and the user id is added to the ``progress_dirty`` set. A background task
+    moves the accumulated deltas to ``user_progress`` with one statement per
+    batch of users, so swipes never wait for a database commit.
+    """
+
+    dirty_key = 'progress_dirty'
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        flush_interval: float = conf.progress.flush_interval,
+        batch_size: int = conf.progress.flush_batch_size,
+    ):
+        """Initialize buffer.
+
+        :param redis_client: Redis client where deltas are stored
+        :param sessionmaker: Session maker for flushes
+        :param flush_interval: Seconds between flushes
+        :param batch_size: How many users are flushed by one statement
+        """
+        self.redis = redis_client
+        self.sessionmaker = sessionmaker
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _delta_key(user_id: int) -> str:
+        return f"progress_delta:{user_id}"
+
+    async def add(self, user_id: int, counter: str, points: int = 0) -> None:
+        """Increment a progress counter by one and add points.
+
+        :param counter: UserProgress counter, e.g. ``total_likes_given``
+        :param points: Points to add
+        """
+        key = self._delta_key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, counter, 1)
+            if points:
+                pipe.hincrby(key, 'total_points', points)
+            pipe.sadd(self.dirty_key, user_id)
+            await pipe.execute()
+
+    async def get_delta(self, user_id: int) -> dict[str, int]:
+        """Get counters of the user which are not flushed yet."""
+        raw = await self.redis.hgetall(self._delta_key(user_id))
+        return {counter.decode(): int(value) for counter, value in raw.items()}
+
+    async def get_progress(self, user_id: int, db: Database) -> ProgressSnapshot:
+        """Get user progress from the database merged with unflushed counters."""
+        progress = await db.progress.get_user_progress(user_id)
+        snapshot = ProgressSnapshot(user_id=user_id)
+        if progress:
+            for field in vars(snapshot):
+                value = getattr(progress, field)
+                if value is not None:
+                    setattr(snapshot, field, value)
+
+        for counter, value in (await self.get_delta(user_id)).items():
+            setattr(snapshot, counter, getattr(snapshot, counter) + value)
+        return snapshot
+
+    async def flush(self) -> int:
+        """Write buffered counters of one batch of users to the database.
+
+        :return: Count of flushed users.
+        """
+        user_ids = await self.redis.spop(self.dirty_key, self.batch_size)
+        if not user_ids:
+            return 0
+
+        # Забираем и удаляем дельты атомарно, чтобы не потерять инкременты между чтением и удалением
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for user_id in user_ids:
+                pipe.hgetall(self._delta_key(int(user_id)))
+                pipe.delete(self._delta_key(int(user_id)))
+            results = await pipe.execute()
+
+        deltas = {
+            int(user_id): {counter.decode(): int(value) for counter, value in raw.items()}
+            for user_id, raw in zip(user_ids, results[::2])
+            if raw
+        }
+        if not deltas:
+            return len(user_ids)
+
+        try:
+            async with self.sessionmaker() as session:
+                await Database(session).progress.add_deltas(deltas)
+        except Exception:
+            await self._restore(deltas)
+            raise
+        return len(user_ids)
+
+    async def _restore(self, deltas: dict[int, dict[str, int]]) -> None:
+        """Put not written deltas back to be flushed next time."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for user_id, delta in deltas.items():
+                for counter, value in delta.items():
+                    pipe.hincrby(self._delta_key(user_id), counter, value)
+                pipe.sadd(self.dirty_key, user_id)
+            await pipe.execute()
+
+    async def flush_all(self) -> None:
+        """Flush batches until the buffer is empty."""
+        while await self.flush() >= self.batch_size:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logging.error(f"Error flushing progress counters: {e}")
+
+    async def start(self) -> None:
+        """Start periodic flushing."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.flush_all()
+        except Exception as e:
+            logging.error(f"Error flushing progress counters on shutdown: {e}")
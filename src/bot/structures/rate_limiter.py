@@ -0,0 +1,252 @@
+"""Rate limiting of outbound Telegram messages shared through Redis."""
+import asyncio
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from redis.asyncio import Redis
+
+from src.configuration import conf
+
+
+# Проверяет паузы после flood wait и все корзины токенов, токены списываются только если их хватает везде.
+# KEYS: глобальная пауза, пауза чата, корзины. ARGV: скорость, емкость и нужный остаток токенов каждой корзины.
+# Возвращает сколько секунд нужно подождать, 0 - можно отправлять.
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local wait = 0
+for i = 1, 2 do
+    local paused_until = tonumber(redis.call('GET', KEYS[i]) or 0)
+    wait = math.max(wait, paused_until - now)
+end
+if wait > 0 then
+    return tostring(wait)
+end
+
+local buckets = {}
+for i = 3, #KEYS do
+    local rate = tonumber(ARGV[(i - 3) * 3 + 1])
+    local burst = tonumber(ARGV[(i - 3) * 3 + 2])
+    local need = tonumber(ARGV[(i - 3) * 3 + 3])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < need then
+        wait = math.max(wait, (need - tokens) / rate)
+    end
+    buckets[i] = {tokens, math.ceil(burst / rate) + 1}
+end
+if wait > 0 then
+    return tostring(wait)
+end
+
+for i = 3, #KEYS do
+    redis.call('HSET', KEYS[i], 'tokens', tostring(buckets[i][1] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], buckets[i][2])
+end
+return '0'
+"""
+
+# Запоминает паузу из flood wait, не сокращая уже установленную.
+PAUSE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local paused_until = now + tonumber(ARGV[1])
+if paused_until > tonumber(redis.call('GET', KEYS[1]) or 0) then
+    redis.call('SET', KEYS[1], tostring(paused_until), 'EX', math.ceil(tonumber(ARGV[1])) + 1)
+end
+return 1
+"""
+
+
+class Priority(IntEnum):
+    """Lanes of outbound messages, lower value is sent first."""
+
+    INTERACTIVE = 0
+    NOTIFICATION = 1
+    BROADCAST = 2
+
+
+_priority: ContextVar[Priority] = ContextVar('send_priority', default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def send_priority(priority: Priority) -> Iterator[None]:
+    """Send messages inside the block in the given lane.
+
+    Tasks created inside the block inherit the lane.
+
+    Example:
+    >> with send_priority(Priority.BROADCAST):
+    >>     await bot.send_message(user_id, text)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimiter:
+    """Token buckets of outbound messages shared by all bot processes.
+
+    Every message takes a token from the global bucket and from the bucket of
+    its chat, which is slower for groups. After ``TelegramRetryAfter`` the chat
+    (or the whole bot, if the chat isn't known) is paused for ``retry_after``.
+
+    Part of the global bucket is reserved for more important lanes:
+    notifications are sent only while ``notification_reserve`` of the bucket
+    is left and broadcasts only while ``broadcast_reserve`` is left, so bulk
+    sends use spare capacity and never delay replies to users.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        global_rate: float = conf.rate_limit.global_rate,
+        global_burst: int = conf.rate_limit.global_burst,
+        chat_rate: float = conf.rate_limit.chat_rate,
+        chat_burst: int = conf.rate_limit.chat_burst,
+        group_rate: float = conf.rate_limit.group_rate,
+        group_burst: int = conf.rate_limit.group_burst,
+        notification_reserve: float = conf.rate_limit.notification_reserve,
+        broadcast_reserve: float = conf.rate_limit.broadcast_reserve,
+    ):
+        """Initialize rate limiter.
+
+        :param redis_client: Redis client where buckets are stored
+        :param global_rate: Messages per second of the whole bot
+        :param global_burst: Messages the whole bot may send at once
+        :param chat_rate: Messages per second to one private chat
+        :param chat_burst: Messages to one private chat which may be sent at once
+        :param group_rate: Messages per second to one group
+        :param group_burst: Messages to one group which may be sent at once
+        :param notification_reserve: Share of the global bucket notifications can't use
+        :param broadcast_reserve: Share of the global bucket broadcasts can't use
+        """
+        self.redis = redis_client
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.reserves = {
+            Priority.INTERACTIVE: 0,
+            Priority.NOTIFICATION: notification_reserve * global_burst,
+            Priority.BROADCAST: broadcast_reserve * global_burst,
+        }
+        self._acquire_script = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._pause_script = redis_client.register_script(PAUSE_SCRIPT)
+
+    @staticmethod
+    def _pause_key(chat_id: int | str | None = None) -> str:
+        return f"rate_limit:pause:{chat_id}" if chat_id is not None else "rate_limit:pause"
+
+    @staticmethod
+    def _normalize_chat_id(chat_id: int | str | None) -> int | str | None:
+        # aiogram принимает id и строкой, приводим к числу, чтобы у чата была одна корзина
+        if isinstance(chat_id, str) and chat_id.lstrip('-').isdigit():
+            return int(chat_id)
+        return chat_id
+
+    @staticmethod
+    def _is_group(chat_id: int | str) -> bool:
+        # У групп и каналов отрицательный id или @username
+        if isinstance(chat_id, str):
+            return chat_id.startswith('@')
+        return chat_id < 0
+
+    def _buckets(self, chat_id: int | str | None, priority: Priority) -> tuple[list[str], list[float]]:
+        keys = ["rate_limit:global"]
+        args = [self.global_rate, self.global_burst, 1 + self.reserves[priority]]
+        if chat_id is not None:
+            keys.append(f"rate_limit:chat:{chat_id}")
+            if self._is_group(chat_id):
+                args += [self.group_rate, self.group_burst, 1]
+            else:
+                args += [self.chat_rate, self.chat_burst, 1]
+        return keys, args
+
+    async def acquire(self, chat_id: int | str | None = None, priority: Priority | None = None) -> None:
+        """Wait until a message to the chat may be sent.
+
+        :param chat_id: (Optional) Chat the message is sent to
+        :param priority: (Optional) Lane of the message, by default the lane
+        set with ``send_priority``
+        """
+        chat_id = self._normalize_chat_id(chat_id)
+        keys, args = self._buckets(chat_id, _priority.get() if priority is None else priority)
+        keys = [self._pause_key(), self._pause_key(chat_id if chat_id is not None else '-'), *keys]
+        while True:
+            try:
+                wait = float(await self._acquire_script(keys=keys, args=args))
+            except Exception as e:
+                # Без Redis не блокируем отправку сообщений
+                logging.warning(f"Rate limiter is unavailable: {e}")
+                return
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def pause(self, retry_after: float, chat_id: int | str | None = None) -> None:
+        """Pause messages to the chat, or of the whole bot, after flood wait.
+
+        :param retry_after: Seconds Telegram asked to wait
+        :param chat_id: (Optional) Chat which hit the limit
+        """
+        chat_id = self._normalize_chat_id(chat_id)
+        try:
+            await self._pause_script(keys=[self._pause_key(chat_id)], args=[retry_after])
+        except Exception as e:
+            logging.warning(f"Rate limiter is unavailable: {e}")
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Bot session middleware which throttles outbound messages.
+
+    Requests which send or edit messages wait for the ``RateLimiter``, on
+    ``TelegramRetryAfter`` the request is paused and repeated.
+    """
+
+    limited_methods = ('send', 'copy', 'forward', 'edit')
+    """ Prefixes of Bot API methods which are rate limited """
+
+    def __init__(self, limiter: RateLimiter, max_retries: int = conf.rate_limit.max_retries):
+        """Initialize middleware.
+
+        :param limiter: Shared rate limiter
+        :param max_retries: How many times a request is repeated after flood wait
+        """
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Wait for the rate limiter and make request."""
+        if not method.__api_method__.startswith(self.limited_methods):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, 'chat_id', None)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                logging.warning(f"Flood wait {e.retry_after}s on {method.__api_method__} to chat {chat_id}")
+                await self.limiter.pause(e.retry_after, chat_id)
+                if attempt == self.max_retries:
+                    raise
@@ -8,41 +8,88 @@ import time
 from src.configuration import conf
 
 
+# Удаляет устаревшие уведомления, добавляет новое и возвращает количество ожидающих.
+# Повторный лайк того же пользователя только обновляет время уведомления.
+# Время отправки дайджеста автору откладывается до паузы в лайках, но не дальше max_delay от первого лайка.
+ADD_NOTIFICATION_SCRIPT = """
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - ttl)
+redis.call('ZADD', KEYS[1], now, ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[4]) - 1)
+redis.call('EXPIRE', KEYS[1], ttl)
+local first = tonumber(redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')[2])
+local due = math.min(now + tonumber(ARGV[5]), first + tonumber(ARGV[6]))
+redis.call('ZADD', KEYS[2], due, ARGV[7])
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# Удаляет устаревшие уведомления, возвращает оставшиеся и очищает очередь.
+DRAIN_NOTIFICATIONS_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+local notifications = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+redis.call('DEL', KEYS[1])
+return notifications
+"""
+
+# Забирает авторов, которым пора отправить дайджест, чтобы другой процесс не отправил его повторно.
+POP_DUE_AUTHORS_SCRIPT = """
+local authors = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #authors > 0 then
+    redis.call('ZREM', KEYS[1], unpack(authors))
+end
+return authors
+"""
+
+# Переносит ожидающие уведомления в дайджест, который автор увидит по кнопке "поделиться контактом".
+MOVE_TO_DIGEST_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+local notifications = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+if #notifications > 0 then
+    redis.call('ZUNIONSTORE', KEYS[2], 2, KEYS[2], KEYS[1], 'AGGREGATE', 'MAX')
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[3]))
+    redis.call('DEL', KEYS[1])
+end
+return notifications
+"""
+
+
 class RedisCache:
-    """Redis cache manager for user states and data."""
+    """Redis cache manager for user states and data.
+
+    Like notifications of an author are kept in the ``like_notifications:{author_id}``
+    sorted set scored by time, every operation on it is one Lua script call.
+    Authors with pending likes are scheduled in the ``like_notifications_due``
+    sorted set scored by the time their digest should be sent. Sent
+    notifications are moved to ``like_digest:{author_id}``.
+    """
+
+    like_notification_ttl = 300
+    """ How long a like notification waits to be grouped, in seconds """
+    like_notifications_limit = 100
+    """ Max count of pending like notifications of one author """
+    like_digest_ttl = 60 * 60 * 24
+    """ How long the author can see who liked the dreams from the digest """
+    like_notifications_due_key = 'like_notifications_due'
     
     def __init__(self, redis_client: Redis):
         """Initialize Redis cache manager."""
         self.redis = redis_client
         self.default_ttl = 3600  # 1 час по умолчанию
-    
-    async def set_user_offset(self, user_id: int, offset: int, ttl: int = None) -> None:
-        """Set user's dream offset."""
-        key = f"user_offset:{user_id}"
-        await self.redis.setex(key, ttl or self.default_ttl, offset)
-    
-    async def get_user_offset(self, user_id: int) -> int:
-        """Get user's dream offset."""
-        key = f"user_offset:{user_id}"
-        value = await self.redis.get(key)
-        return int(value) if value else 0
-    
-    async def increment_user_offset(self, user_id: int, ttl: int = None) -> int:
-        """Increment user's dream offset."""
-        key = f"user_offset:{user_id}"
-        offset = await self.redis.incr(key)
-        await self.redis.expire(key, ttl or self.default_ttl)
-        return offset
-    
-    async def clear_user_offset(self, user_id: int) -> None:
-        """Clear user's dream offset."""
-        key = f"user_offset:{user_id}"
-        await self.redis.delete(key)
-    
-    async def reset_user_offset(self, user_id: int) -> None:
-        """Reset user's dream offset to 0."""
-        key = f"user_offset:{user_id}"
-        await self.redis.setex(key, self.default_ttl, 0)
+        self._add_notification_script = redis_client.register_script(ADD_NOTIFICATION_SCRIPT)
+        self._drain_notifications_script = redis_client.register_script(DRAIN_NOTIFICATIONS_SCRIPT)
+        self._pop_due_authors_script = redis_client.register_script(POP_DUE_AUTHORS_SCRIPT)
+        self._move_to_digest_script = redis_client.register_script(MOVE_TO_DIGEST_SCRIPT)
+
+    @staticmethod
+    def _like_notifications_key(author_id: int) -> str:
+        return f"like_notifications:{author_id}"
+
+    @staticmethod
+    def _like_digest_key(author_id: int) -> str:
+        return f"like_digest:{author_id}"
     
     async def set_image_cache(self, image_hash: str, image_data: bytes, ttl: int = 7200) -> None:
         """Cache image data."""
@@ -59,50 +106,54 @@ class RedisCache:
         # Redis автоматически очищает по TTL, но можно добавить дополнительную логику
         pass
 
-    async def add_like_notification(self, author_id: int, dream_id: int, liker_info: dict) -> bool:
-        """Добавляет уведомление о лайке в очередь для группировки."""
-        key = f"like_notifications:{author_id}"
-        
-        # Получаем существующие уведомления
-        existing = await self.redis.get(key)
-        if existing:
-            notifications = json.loads(existing)
-        else:
-            notifications = []
-        
-        # Добавляем новое уведомление
-        notification = {
-            "dream_id": dream_id,
-            "liker_info": liker_info,
-            "timestamp": time.time()
-        }
-        notifications.append(notification)
-        
-        # Сохраняем обновленный список
-        await self.redis.setex(key, 300, json.dumps(notifications))  # TTL 5 минут
-        
-        return True
+    async def add_like_notification(self, author_id: int, dream_id: int, liker_info: dict) -> int:
+        """Добавляет уведомление о лайке в очередь для группировки.
+
+        :return: Количество ожидающих уведомлений вместе с добавленным.
+        """
+        notification = json.dumps({"dream_id": dream_id, "liker_info": liker_info}, sort_keys=True)
+        return await self._add_notification_script(
+            keys=[self._like_notifications_key(author_id), self.like_notifications_due_key],
+            args=[
+                time.time(), notification, self.like_notification_ttl, self.like_notifications_limit,
+                conf.notification.quiet_period, conf.notification.max_delay, author_id,
+            ],
+        )
+
+    async def pop_due_like_authors(self, limit: int = 100) -> list[int]:
+        """Забирает авторов, которым пора отправить дайджест лайков."""
+        authors = await self._pop_due_authors_script(
+            keys=[self.like_notifications_due_key], args=[time.time(), limit]
+        )
+        return [int(author_id) for author_id in authors]
+
+    async def move_like_notifications_to_digest(self, author_id: int) -> list:
+        """Переносит ожидающие уведомления в дайджест и возвращает их."""
+        raw = await self._move_to_digest_script(
+            keys=[self._like_notifications_key(author_id), self._like_digest_key(author_id)],
+            args=[time.time(), self.like_notification_ttl, self.like_digest_ttl],
+        )
+        return self._load_notifications(raw)
+
+    async def drain_like_notifications(self, author_id: int) -> list:
+        """Атомарно забирает и очищает уведомления, о которых автору уже сообщили."""
+        raw = await self._drain_notifications_script(
+            keys=[self._like_digest_key(author_id)],
+            args=[time.time(), self.like_digest_ttl],
+        )
+        return self._load_notifications(raw)
 
-    async def get_pending_like_notifications(self, author_id: int) -> list:
-        """Получает все ожидающие уведомления о лайках для пользователя."""
-        key = f"like_notifications:{author_id}"
-        existing = await self.redis.get(key)
-        
-        if existing:
-            notifications = json.loads(existing)
-            # Удаляем уведомления старше 5 минут
-            current_time = time.time()
-            notifications = [n for n in notifications if current_time - n["timestamp"] < 300]
-            
-            if notifications:
-                # Обновляем список без старых уведомлений
-                await self.redis.setex(key, 300, json.dumps(notifications))
-                return notifications
-        
-        return []
+    @staticmethod
+    def _load_notifications(raw: list) -> list:
+        # Ответ скрипта - плоский список: уведомление, время, уведомление, время...
+        notifications = []
+        for member, timestamp in zip(raw[::2], raw[1::2]):
+            notification = json.loads(member)
+            notification["timestamp"] = float(timestamp)
+            notifications.append(notification)
+        return notifications
 
     async def clear_like_notifications(self, author_id: int) -> bool:
         """Очищает все уведомления о лайках для пользователя."""
-        key = f"like_notifications:{author_id}"
-        await self.redis.delete(key)
+        await self.redis.delete(self._like_digest_key(author_id))
         return True
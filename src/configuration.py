@@ -15,19 +15,39 @@ class DatabaseConfig:
     passwd: str | None = getenv('POSTGRES_PASSWORD', "povt203")
     port: int = int(getenv('POSTGRES_PORT', 5432))
     host: str = getenv('POSTGRES_HOST', 'db')
+    read_host: str | None = getenv('POSTGRES_READ_HOST')
+    """ (Optional) Read replica host for read-only queries """
+    read_port: int = int(getenv('POSTGRES_READ_PORT', getenv('POSTGRES_PORT', 5432)))
 
     driver: str = 'asyncpg'
     database_system: str = 'postgresql'
 
-    def build_connection_str(self) -> str:
-        """This function build a connection string."""
+    pool_size: int = int(getenv('POSTGRES_POOL_SIZE', 10))
+    max_overflow: int = int(getenv('POSTGRES_MAX_OVERFLOW', 20))
+    """ Connections opened above pool_size under load and closed afterwards """
+    pool_recycle: int = int(getenv('POSTGRES_POOL_RECYCLE', 1800))
+    """ Reconnect connections older than this, in seconds (-1 to disable) """
+    pool_timeout: float = float(getenv('POSTGRES_POOL_TIMEOUT', 30))
+    """ How long to wait for a free connection, in seconds """
+    statement_cache_size: int = int(getenv('POSTGRES_STATEMENT_CACHE_SIZE', 100))
+    """ asyncpg prepared statements cache per connection (0 for pgbouncer in transaction mode) """
+    prepared_statement_cache_size: int = int(getenv('POSTGRES_PREPARED_STATEMENT_CACHE_SIZE', 100))
+    """ SQLAlchemy asyncpg dialect cache of prepared statements per connection """
+    health_check_interval: float = float(getenv('POSTGRES_HEALTH_CHECK_INTERVAL', 0))
+    """ Check pool with a periodic background query instead of a ping on every checkout (0 to disable) """
+
+    def build_connection_str(self, read_replica: bool = False) -> str:
+        """This function build a connection string.
+
+        :param read_replica: Build connection string of the read replica
+        """
         return URL.create(
             drivername=f'{self.database_system}+{self.driver}',
             username=self.user,
             database=self.name,
             password=self.passwd,
-            port=self.port,
-            host=self.host,
+            port=self.read_port if read_replica else self.port,
+            host=self.read_host if read_replica else self.host,
         ).render_as_string(hide_password=False)
 
 
@@ -45,6 +65,122 @@ class RedisConfig:
     data_ttl: int | None = getenv('REDIS_TTL_DATA', None)
 
 
+@dataclass
+class FeedConfig:
+    """Dream feed prefetching settings."""
+
+    batch_size: int = int(getenv('FEED_BATCH_SIZE', 20))
+    """ How many dreams are prefetched into the user's feed at once """
+    refill_threshold: int = int(getenv('FEED_REFILL_THRESHOLD', 5))
+    """ Feed is refilled in the background when fewer dreams are left """
+    scan_batch_size: int = int(getenv('FEED_SCAN_BATCH_SIZE', 1000))
+    """ How many dream ids are checked per query when skipping already judged dreams """
+    max_scan_batches: int = int(getenv('FEED_MAX_SCAN_BATCHES', 5))
+    """ Scan queries per fill in the request path, the rest continues in the background """
+    lock_ttl: int = int(getenv('FEED_LOCK_TTL', 30))
+    """ Seconds after which the fill of a crashed process may be taken over """
+    ttl: int = int(getenv('FEED_TTL', 3600))
+    seen_ttl: int = int(getenv('FEED_SEEN_TTL', 60 * 60 * 24 * 30))
+    """ How long the user's already judged dreams are excluded from the feed """
+
+
+@dataclass
+class ProgressConfig:
+    """Write-behind progress counters settings."""
+
+    flush_interval: float = float(getenv('PROGRESS_FLUSH_INTERVAL', 5))
+    """ How often buffered counters are written to the database, in seconds """
+    flush_batch_size: int = int(getenv('PROGRESS_FLUSH_BATCH_SIZE', 500))
+    """ How many users are written by one statement """
+
+
+@dataclass
+class UserCacheConfig:
+    """User profile cache settings."""
+
+    size: int = int(getenv('USER_CACHE_SIZE', 10000))
+    """ Max count of users kept in process memory """
+    local_ttl: float = float(getenv('USER_CACHE_LOCAL_TTL', 30))
+    ttl: int = int(getenv('USER_CACHE_TTL', 600))
+    """ Time-To-Live of the profiles cached in Redis """
+    negative_ttl: int = int(getenv('USER_CACHE_NEGATIVE_TTL', 30))
+    """ How long a user is remembered as not registered """
+
+
+@dataclass
+class DownloadConfig:
+    """Telegram file downloads settings."""
+
+    timeout: int = int(getenv('DOWNLOAD_TIMEOUT', 30))
+    """ Total timeout of one download in seconds """
+    max_size: int = int(getenv('DOWNLOAD_MAX_SIZE', 20 * 1024 * 1024))
+    """ Max size of a downloaded file in bytes """
+    chunk_size: int = int(getenv('DOWNLOAD_CHUNK_SIZE', 64 * 1024))
+    spool_threshold: int = int(getenv('DOWNLOAD_SPOOL_THRESHOLD', 1024 * 1024))
+    """ Files of unknown size above this are buffered on disk """
+
+
+@dataclass
+class MediaConfig:
+    """Dream images processing settings."""
+
+    max_side: int = int(getenv('MEDIA_MAX_SIDE', 1280))
+    """ Max width and height of the image shown in the feed """
+    thumbnail_side: int = int(getenv('MEDIA_THUMBNAIL_SIDE', 320))
+    image_format: str = getenv('MEDIA_FORMAT', 'JPEG')
+    """ Output format, JPEG or WEBP """
+    quality: int = int(getenv('MEDIA_QUALITY', 85))
+    workers: int = int(getenv('MEDIA_WORKERS', 2))
+    """ Count of processes which re-encode images """
+
+
+@dataclass
+class NotificationConfig:
+    """Like digest notifications settings."""
+
+    quiet_period: float = float(getenv('NOTIFICATION_QUIET_PERIOD', 60))
+    """ Digest is sent when the author got no new likes for this long, in seconds """
+    max_delay: float = float(getenv('NOTIFICATION_MAX_DELAY', 240))
+    """ Digest is sent at latest this long after the first like, in seconds """
+    digest_interval: float = float(getenv('NOTIFICATION_DIGEST_INTERVAL', 5))
+    """ How often due digests are checked, in seconds """
+    digest_batch_size: int = int(getenv('NOTIFICATION_DIGEST_BATCH_SIZE', 100))
+
+
+@dataclass
+class RateLimitConfig:
+    """Outbound Telegram messages limits."""
+
+    global_rate: float = float(getenv('RATE_LIMIT_GLOBAL', 30))
+    """ Messages per second of the whole bot """
+    global_burst: int = int(getenv('RATE_LIMIT_GLOBAL_BURST', 30))
+    chat_rate: float = float(getenv('RATE_LIMIT_CHAT', 1))
+    """ Messages per second to one private chat """
+    chat_burst: int = int(getenv('RATE_LIMIT_CHAT_BURST', 5))
+    group_rate: float = float(getenv('RATE_LIMIT_GROUP_PER_MINUTE', 20)) / 60
+    """ Messages per second to one group """
+    group_burst: int = int(getenv('RATE_LIMIT_GROUP_BURST', 3))
+    notification_reserve: float = float(getenv('RATE_LIMIT_NOTIFICATION_RESERVE', 0.2))
+    """ Share of the global limit kept for replies to users, notifications can't use it """
+    broadcast_reserve: float = float(getenv('RATE_LIMIT_BROADCAST_RESERVE', 0.5))
+    """ Share of the global limit kept for replies and notifications, broadcasts can't use it """
+    max_retries: int = int(getenv('RATE_LIMIT_MAX_RETRIES', 3))
+    """ How many times a message is repeated after flood wait """
+
+
+@dataclass
+class BroadcastConfig:
+    """Broadcasts to all users settings."""
+
+    chunk_size: int = int(getenv('BROADCAST_CHUNK_SIZE', 1000))
+    """ How many user ids are fetched from the database cursor at once """
+    concurrency: int = int(getenv('BROADCAST_CONCURRENCY', 20))
+    """ Messages sent at once, progress is saved after each batch """
+    lock_ttl: int = int(getenv('BROADCAST_LOCK_TTL', 600))
+    stats_ttl: int = int(getenv('BROADCAST_STATS_TTL', 60 * 60 * 24 * 30))
+    """ How long delivery stats of finished runs are kept """
+
+
 @dataclass
 class BotConfig:
     """Bot configuration."""
@@ -61,6 +197,14 @@ class Configuration:
 
     db = DatabaseConfig()
     redis = RedisConfig()
+    feed = FeedConfig()
+    progress = ProgressConfig()
+    user_cache = UserCacheConfig()
+    download = DownloadConfig()
+    media = MediaConfig()
+    notification = NotificationConfig()
+    rate_limit = RateLimitConfig()
+    broadcast = BroadcastConfig()
     bot = BotConfig()
 
 
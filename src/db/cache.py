@@ -0,0 +1,199 @@
+"""Two-tier cache of user profiles."""
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from redis.asyncio import Redis
+
+from src.bot.structures.role import Role
+from src.configuration import conf
+
+
+NOT_REGISTERED = object()
+""" Cached result for the user who is not registered """
+
+# Значение в Redis для незарегистрированного пользователя
+_NOT_REGISTERED_VALUE = b'-'
+
+
+@dataclass
+class UserSnapshot:
+    """Read-only copy of the user profile kept in the cache."""
+
+    user_id: int
+    user_name: str | None = None
+    name: str | None = None
+    age: int | None = None
+    gender: str | None = None
+    country: str | None = None
+    role: Role = Role.USER
+    created_at: datetime | None = None
+
+    @classmethod
+    def from_user(cls, user) -> 'UserSnapshot':
+        """Build snapshot from the User model."""
+        return cls(
+            user_id=user.user_id,
+            user_name=user.user_name,
+            name=user.name,
+            age=user.age,
+            gender=user.gender,
+            country=user.country,
+            role=user.role or Role.USER,
+            created_at=user.created_at,
+        )
+
+    def dumps(self) -> str:
+        """Serialize snapshot to JSON."""
+        data = asdict(self)
+        data['role'] = self.role.name
+        data['created_at'] = self.created_at.isoformat() if self.created_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> 'UserSnapshot':
+        """Deserialize snapshot from JSON."""
+        data = json.loads(raw)
+        data['role'] = Role[data['role']]
+        data['created_at'] = datetime.fromisoformat(data['created_at']) if data['created_at'] else None
+        return cls(**data)
+
+
+class UserCache:
+    """User profiles cached in process memory and in Redis.
+
+    The first tier is a bounded LRU with a short TTL, so repeated lookups
+    during one update (and bursts of updates from the same user) cost
+    nothing. The second tier is Redis, shared between bot processes, so
+    other processes may see a changed profile up to ``local_ttl`` later.
+
+    Users who are not registered are remembered too, for a short
+    ``negative_ttl``, so spam from unknown users does not reach the database.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis | None = None,
+        size: int = conf.user_cache.size,
+        local_ttl: float = conf.user_cache.local_ttl,
+        ttl: int = conf.user_cache.ttl,
+        negative_ttl: int = conf.user_cache.negative_ttl,
+    ):
+        """Initialize cache.
+
+        :param redis_client: (Optional) Redis client for the shared tier
+        :param size: Max count of users kept in process memory
+        :param local_ttl: Time-To-Live of the in-process tier in seconds
+        :param ttl: Time-To-Live of the Redis tier in seconds
+        :param negative_ttl: Time-To-Live of "not registered" results in seconds
+        """
+        self.redis = redis_client
+        self.size = size
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local: OrderedDict[int, tuple[float, UserSnapshot | object]] = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user_cache:{user_id}"
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups served from any cache tier."""
+        total = self.local_hits + self.redis_hits + self.misses
+        return (self.local_hits + self.redis_hits) / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Get lookup counters of the cache."""
+        return {
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 3),
+        }
+
+    def _count(self, counter: str) -> None:
+        setattr(self, counter, getattr(self, counter) + 1)
+        if (self.local_hits + self.redis_hits + self.misses) % 1000 == 0:
+            logging.info(f"User cache stats: {self.stats()}")
+
+    def _get_local(self, user_id: int) -> UserSnapshot | object | None:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            del self._local[user_id]
+            return None
+        self._local.move_to_end(user_id)
+        return snapshot
+
+    def _set_local(self, user_id: int, snapshot: UserSnapshot | object, ttl: float | None = None) -> None:
+        self._local[user_id] = (time.monotonic() + (self.local_ttl if ttl is None else ttl), snapshot)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.size:
+            self._local.popitem(last=False)
+
+    async def get(self, user_id: int) -> UserSnapshot | object | None:
+        """Get cached user profile.
+
+        :return: User profile, ``NOT_REGISTERED`` if the user is known to be
+        not registered or None on miss.
+        """
+        snapshot = self._get_local(user_id)
+        if snapshot is not None:
+            self._count('local_hits')
+            return snapshot
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self._key(user_id))
+            except Exception as e:
+                logging.warning(f"User cache is unavailable: {e}")
+                raw = None
+            if raw == _NOT_REGISTERED_VALUE:
+                self._set_local(user_id, NOT_REGISTERED, min(self.local_ttl, self.negative_ttl))
+                self._count('redis_hits')
+                return NOT_REGISTERED
+            if raw is not None:
+                snapshot = UserSnapshot.loads(raw)
+                self._set_local(user_id, snapshot)
+                self._count('redis_hits')
+                return snapshot
+
+        self._count('misses')
+        return None
+
+    async def set(self, snapshot: UserSnapshot) -> None:
+        """Put user profile into both tiers."""
+        self._set_local(snapshot.user_id, snapshot)
+        if self.redis is not None:
+            try:
+                await self.redis.set(self._key(snapshot.user_id), snapshot.dumps(), ex=self.ttl)
+            except Exception as e:
+                logging.warning(f"User cache is unavailable: {e}")
+
+    async def set_not_registered(self, user_id: int) -> None:
+        """Remember for a short time that the user is not registered."""
+        self._set_local(user_id, NOT_REGISTERED, min(self.local_ttl, self.negative_ttl))
+        if self.redis is not None:
+            try:
+                await self.redis.set(self._key(user_id), _NOT_REGISTERED_VALUE, ex=self.negative_ttl)
+            except Exception as e:
+                logging.warning(f"User cache is unavailable: {e}")
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop user profile from both tiers."""
+        self._local.pop(user_id, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self._key(user_id))
+            except Exception as e:
+                logging.warning(f"User cache is unavailable: {e}")
@@ -1,22 +1,176 @@
 """Database class with all-in-one features."""
+import asyncio
+import logging
+from collections.abc import Callable
 
-from sqlalchemy.engine.url import URL
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine as _create_async_engine
+from sqlalchemy.orm import FromStatement, ORMExecuteState, Session
 
-from src.configuration import conf
+from src.configuration import DatabaseConfig, conf
 
-from .repositories import UserRepo, DreamRepo, DreamLikedRecordRepo
+from .cache import UserCache
+from .repositories import UserRepo, DreamRepo, DreamLikedRecordRepo, MediaRepo
+from .repositories.abstract import Repository
 from .repositories.achievements import AchievementsRepository, ProgressRepository
 
 
-def create_async_engine(url: URL | str) -> AsyncEngine:
+def create_async_engine(url: URL | str, config: DatabaseConfig = conf.db) -> AsyncEngine:
     """Create async engine with given URL.
 
     :param url: URL to connect
+    :param config: Pool and statement cache settings
     :return: AsyncEngine
     """
-    return _create_async_engine(url=url, echo=conf.debug, pool_pre_ping=True)
+    url = make_url(url)
+    connect_args = {}
+    if url.get_driver_name() == 'asyncpg':
+        url = url.update_query_dict(
+            {'prepared_statement_cache_size': str(config.prepared_statement_cache_size)}
+        )
+        connect_args['statement_cache_size'] = config.statement_cache_size
+
+    return _create_async_engine(
+        url=url,
+        echo=conf.debug,
+        # Без периодической проверки проверяем соединение при каждой выдаче из пула
+        pool_pre_ping=not config.health_check_interval,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_recycle=config.pool_recycle,
+        pool_timeout=config.pool_timeout,
+        connect_args=connect_args,
+    )
+
+
+class RoutingSession(Session):
+    """Session which sends reads to the read replica until the first write.
+
+    The replica engine is taken from ``info['read_engine']``. Only plain
+    SELECTs go to the replica. After any write (flush, INSERT/UPDATE/DELETE,
+    ``select().from_statement()`` with DML ... RETURNING or raw SQL) all
+    following queries of the session go to the primary, even after a commit,
+    so an update always reads its own writes.
+    """
+
+    @staticmethod
+    def _is_read(statement) -> bool:
+        """Check that the statement is a plain SELECT which may go to the replica."""
+        # select().from_statement() оборачивает любой запрос, например INSERT ... RETURNING
+        if isinstance(statement, FromStatement):
+            statement = statement.element
+        return isinstance(statement, Select)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """Choose engine for the statement."""
+        read_engine = self.info.get('read_engine')
+        if (
+            read_engine is not None
+            and self._is_read(clause)
+            and not self._flushing
+            and not self.info.get('has_writes')
+        ):
+            return read_engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _remember_write(orm_execute_state: ORMExecuteState) -> None:
+    if not RoutingSession._is_read(orm_execute_state.statement):
+        orm_execute_state.session.info['has_writes'] = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_flush(session: Session, flush_context) -> None:
+    session.info['has_writes'] = True
+
+
+def create_sessionmaker(
+    engine: AsyncEngine, read_engine: AsyncEngine | None = None
+) -> async_sessionmaker[AsyncSession]:
+    """Create session maker with optional read replica routing.
+
+    :param engine: Primary engine for writes and reads after writes
+    :param read_engine: (Optional) Read replica engine for read-only queries
+    """
+    return async_sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+        info={'read_engine': read_engine} if read_engine is not None else None,
+    )
+
+
+class DatabaseHealthCheck:
+    """Periodic background check of the connection pool.
+
+    Replaces ``pool_pre_ping``: instead of a round-trip on every checkout
+    one query runs every ``interval`` seconds, and the pool is recreated
+    when the database stops answering.
+    """
+
+    def __init__(self, engine: AsyncEngine, interval: float = conf.db.health_check_interval):
+        """Initialize health check.
+
+        :param engine: Engine which pool is checked
+        :param interval: Seconds between checks
+        """
+        self.engine = engine
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def check(self) -> bool:
+        """Run one check and reset the pool if it fails."""
+        try:
+            async with self.engine.connect() as connection:
+                await connection.execute(text('SELECT 1'))
+            return True
+        except Exception as e:
+            logging.warning(f"Database health check failed, resetting connection pool: {e}")
+            await self.engine.dispose()
+            return False
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def start(self) -> None:
+        """Start periodic checks."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic checks."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class _LazyRepository:
+    """Repository which is built only on first access."""
+
+    def __init__(self, factory: Callable[['Database'], Repository]):
+        self.factory = factory
+
+    def __set_name__(self, owner, name: str):
+        self.attribute = f'_{name}'
+
+    def __get__(self, db: 'Database | None', owner=None):
+        if db is None:
+            return self
+        repository = db.__dict__.get(self.attribute)
+        if repository is None:
+            repository = db.__dict__[self.attribute] = self.factory(db)
+        return repository
+
+    def __set__(self, db: 'Database', repository: Repository):
+        db.__dict__[self.attribute] = repository
 
 
 class Database:
@@ -24,38 +178,98 @@ class Database:
 
     is the highest abstraction level of database and
     can be used in the handlers or any others bot-side functions.
+
+    Session and repositories are created lazily: with a ``sessionmaker``
+    nothing is allocated and no connection is checked out from the pool
+    until a handler really uses the database.
     """
 
-    user: UserRepo
+    user = _LazyRepository(lambda db: UserRepo(session=db.session, cache=db.user_cache))
     """ User repository """
-    dream: DreamRepo
+    dream = _LazyRepository(lambda db: DreamRepo(session=db.session))
     """ Dream repository """
-    dream_liked_record: DreamLikedRecordRepo
+    dream_liked_record = _LazyRepository(lambda db: DreamLikedRecordRepo(session=db.session))
     """ Dream repository """
-    achievements: AchievementsRepository
+    media = _LazyRepository(lambda db: MediaRepo(session=db.session))
+    """ Dream media repository """
+    achievements = _LazyRepository(lambda db: AchievementsRepository(session=db.session))
     """ Achievements repository """
-    progress: ProgressRepository
+    progress = _LazyRepository(lambda db: ProgressRepository(session=db.session))
     """ Progress repository """
 
-    session: AsyncSession
-
     def __init__(
         self,
-        session: AsyncSession,
+        session: AsyncSession | None = None,
         user: UserRepo = None,
         dream: DreamRepo = None,
         dream_liked_record: DreamLikedRecordRepo = None,
+        media: MediaRepo = None,
         achievements: AchievementsRepository = None,
         progress: ProgressRepository = None,
+        user_cache: UserCache | None = None,
+        sessionmaker: async_sessionmaker[AsyncSession] | None = None,
+        unit_of_work: bool = False,
     ):
         """Initialize Database class.
 
         :param session: AsyncSession to use
         :param user: (Optional) User repository
+        :param user_cache: (Optional) Cache of user profiles for the user repository
+        :param sessionmaker: (Optional) Session maker to open the session on
+        first use when ``session`` is not given
+        :param unit_of_work: Repositories only flush changes and ``commit``
+        of the Database commits them all at once
+        """
+        if session is None and sessionmaker is None:
+            raise ValueError("Either session or sessionmaker is required")
+
+        self._session = session
+        self._owns_session = session is None
+        self.sessionmaker = sessionmaker
+        self.user_cache = user_cache
+        self.unit_of_work = unit_of_work
+        if session is not None:
+            session.info['unit_of_work'] = unit_of_work
+        for name, repository in (
+            ('user', user),
+            ('dream', dream),
+            ('dream_liked_record', dream_liked_record),
+            ('media', media),
+            ('achievements', achievements),
+            ('progress', progress),
+        ):
+            if repository is not None:
+                setattr(self, name, repository)
+
+    @property
+    def session(self) -> AsyncSession:
+        """Session of the database, opened on first access."""
+        if self._session is None:
+            self._session = self.sessionmaker()
+            self._session.info['unit_of_work'] = self.unit_of_work
+        return self._session
+
+    async def commit(self) -> None:
+        """Commit changes flushed by repositories in unit-of-work mode.
+
+        Does nothing if the session was not opened or nothing was changed.
         """
-        self.session = session
-        self.user = user or UserRepo(session=session)
-        self.dream = dream or DreamRepo(session=session)
-        self.dream_liked_record = dream_liked_record or DreamLikedRecordRepo(session=session)
-        self.achievements = achievements or AchievementsRepository(session=session)
-        self.progress = progress or ProgressRepository(session=session)
+        session = self._session
+        if session is None:
+            return
+        if session.info.pop('has_changes', False) or session.new or session.dirty or session.deleted:
+            await session.commit()
+        for callback in session.info.pop('after_commit', []):
+            await callback()
+
+    async def rollback(self) -> None:
+        """Rollback the session if it was opened."""
+        if self._session is not None:
+            self._session.info.pop('has_changes', None)
+            self._session.info.pop('after_commit', None)
+            await self._session.rollback()
+
+    async def close(self) -> None:
+        """Close the session if it was opened by this Database."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
@@ -1,7 +1,8 @@
 """Init file for models namespace."""
 from .base import Base
 from .user import User
+from .media import DreamMedia
 from .dreams import Dream, DreamLikedRecord
 from .achievements import UserAchievement, UserProgress
 
-__all__ = ('Base', 'User', 'Dream', 'DreamLikedRecord', 'UserAchievement', 'UserProgress')
+__all__ = ('Base', 'User', 'Dream', 'DreamLikedRecord', 'DreamMedia', 'UserAchievement', 'UserProgress')
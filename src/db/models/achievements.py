@@ -1,6 +1,6 @@
 """Achievement models for Wanty bot."""
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -10,6 +10,10 @@ from src.db.models.base import Base
 class UserAchievement(Base):
     """User achievement model."""
     __tablename__ = "user_achievements"
+    __table_args__ = (
+        # Проверка is_achievement_unlocked ищет по паре (user_id, achievement_id)
+        Index('ix_user_achievements_user_id_achievement_id', 'user_id', 'achievement_id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(BigInteger, ForeignKey("user.user_id"), nullable=False)  # Changed from Integer to BigInteger
@@ -13,14 +13,15 @@ class Dream(Base):
 
     """ Telegram from user id """
     user_id: Mapped[int] = mapped_column(
-        sa.BigInteger, unique=False, nullable=False
+        sa.BigInteger, unique=False, nullable=False, index=True
     )
     """ Telegram from user name """
     username: Mapped[int] = mapped_column(
         sa.Text, unique=False, nullable=True
     )
-    image = mapped_column(
-        sa.LargeBinary, nullable=True
+    """ SHA-256 of the image in the media store """
+    image_hash: Mapped[str] = mapped_column(
+        sa.Text, sa.ForeignKey('dream_media.sha256'), unique=False, nullable=True
     )
     name: Mapped[str] = mapped_column(
         sa.Text, unique=False, nullable=True
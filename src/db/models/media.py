@@ -0,0 +1,47 @@
+"""Dream media model file."""
+import sqlalchemy as sa
+from sqlalchemy import DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class DreamMedia(Base):
+    """Content-addressed image of a dream."""
+
+    __tablename__ = 'dream_media'
+
+    """ Hex SHA-256 of the image content """
+    sha256: Mapped[str] = mapped_column(
+        sa.Text, unique=True, nullable=False
+    )
+    """ Image content, loaded only when explicitly asked """
+    data = mapped_column(
+        sa.LargeBinary, nullable=False, deferred=True
+    )
+    """ Small preview of the image, loaded only when explicitly asked """
+    thumbnail = mapped_column(
+        sa.LargeBinary, nullable=True, deferred=True
+    )
+    size: Mapped[int] = mapped_column(
+        sa.Integer, unique=False, nullable=True
+    )
+    """ Telegram file_id of the uploaded image """
+    file_id: Mapped[str] = mapped_column(
+        sa.Text, unique=False, nullable=True
+    )
+    """ Telegram file_unique_id of the photo the image was made from """
+    file_unique_id: Mapped[str] = mapped_column(
+        sa.Text, unique=False, nullable=True, index=True
+    )
+    """ Count of dreams which use the image """
+    ref_count: Mapped[int] = mapped_column(
+        sa.Integer, unique=False, nullable=False, server_default='0'
+    )
+    """ Telegram file_id of the uploaded thumbnail """
+    thumbnail_file_id: Mapped[str] = mapped_column(
+        sa.Text, unique=False, nullable=True
+    )
+    created_at = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
@@ -2,6 +2,7 @@
 from .abstract import Repository
 from .user import UserRepo
 from .dreams import DreamRepo, DreamLikedRecordRepo
+from .media import MediaRepo
 from .achievements import AchievementsRepository, ProgressRepository
 
-__all__ = ('UserRepo', 'Repository', 'DreamRepo', 'DreamLikedRecordRepo', 'AchievementsRepository', 'ProgressRepository')
+__all__ = ('UserRepo', 'Repository', 'DreamRepo', 'DreamLikedRecordRepo', 'MediaRepo', 'AchievementsRepository', 'ProgressRepository')
@@ -1,7 +1,7 @@
 """Repository file."""
 import abc
 from typing import Generic, TypeVar
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Sequence
 
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -26,6 +26,36 @@ class Repository(Generic[AbstractModel]):
         self.type_model = type_model
         self.session = session
 
+    @property
+    def unit_of_work(self) -> bool:
+        """Whether changes are committed once by the owner of the session."""
+        return self.session.info.get('unit_of_work', False)
+
+    async def commit(self) -> None:
+        """Commit changes of the repository.
+
+        In unit-of-work mode changes are only flushed, the owner of the
+        session (``DatabaseMiddleware``) commits them once per update.
+        """
+        if self.unit_of_work:
+            await self.session.flush()
+            self.session.info['has_changes'] = True
+        else:
+            await self.session.commit()
+
+    async def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run callback after changes are really committed.
+
+        In unit-of-work mode the callback runs after the owner of the session
+        commits, otherwise ``commit`` has already committed and it runs at once.
+
+        :param callback: Coroutine function without arguments
+        """
+        if self.unit_of_work:
+            self.session.info.setdefault('after_commit', []).append(callback)
+        else:
+            await callback()
+
     async def get(self, ident: int | str) -> AbstractModel:
         """Get an ONE model from the database with PK.
 
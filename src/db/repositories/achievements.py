@@ -2,7 +2,9 @@
 
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import BigInteger, Integer, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 from src.db.models.achievements import UserAchievement, UserProgress
@@ -38,7 +40,7 @@ class AchievementsRepository(Repository[UserAchievement]):
             points_earned=points
         )
         self.session.add(achievement)
-        await self.session.commit()
+        await self.commit()
         return achievement
     
     async def is_achievement_unlocked(self, user_id: int, achievement_id: str) -> bool:
@@ -75,81 +77,87 @@ class ProgressRepository(Repository[UserProgress]):
         
         progress = UserProgress(user_id=user_id)
         self.session.add(progress)
-        await self.session.commit()
+        await self.commit()
         return progress
     
-    async def increment_dreams(self, user_id: int, points: int = 15) -> UserProgress:
-        """Increment user's dream count and points."""
-        # Проверяем, существует ли пользователь
-        user_query = select(User).where(User.user_id == user_id)
-        user_result = await self.session.execute(user_query)
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
+    async def _increment(self, user_id: int, counter, points: int) -> UserProgress:
+        """Atomically increment a progress counter and points.
+
+        Runs one ``INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING``,
+        so the progress row is created on the first increment and concurrent
+        increments are never lost.
+
+        :param counter: UserProgress column to increment by one
+        :param points: Points to add
+        """
+        statement = insert(UserProgress).values(
+            user_id=user_id, **{counter.key: 1}, total_points=points
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserProgress.user_id],
+            set_={
+                counter.key: func.coalesce(counter, 0) + 1,
+                UserProgress.total_points.key: func.coalesce(UserProgress.total_points, 0) + points,
+            },
+        ).returning(UserProgress)
+
+        try:
+            # Точка сохранения откатывает только этот запрос, не трогая остальные изменения сессии
+            async with self.session.begin_nested():
+                progress = await self.session.scalar(
+                    select(UserProgress).from_statement(statement).execution_options(populate_existing=True)
+                )
+        except IntegrityError:
+            # Нарушен внешний ключ - пользователя не существует
             raise ValueError(f"User {user_id} does not exist")
-        
-        progress = await self.get_user_progress(user_id)
-        if not progress:
-            progress = await self.create_user_progress(user_id)
-        
-        progress.total_dreams += 1
-        progress.total_points += points
-        await self.session.commit()
+
+        await self.commit()
         return progress
-    
+
+    async def increment_dreams(self, user_id: int, points: int = 15) -> UserProgress:
+        """Increment user's dream count and points."""
+        return await self._increment(user_id, UserProgress.total_dreams, points)
+
     async def increment_likes_received(self, user_id: int, points: int = 5) -> UserProgress:
         """Increment user's received likes count and points."""
-        # Проверяем, существует ли пользователь
-        user_query = select(User).where(User.user_id == user_id)
-        user_result = await self.session.execute(user_query)
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
-            raise ValueError(f"User {user_id} does not exist")
-        
-        progress = await self.get_user_progress(user_id)
-        if not progress:
-            progress = await self.create_user_progress(user_id)
-        
-        progress.total_likes_received += 1
-        progress.total_points += points
-        await self.session.commit()
-        return progress
-    
+        return await self._increment(user_id, UserProgress.total_likes_received, points)
+
     async def increment_dreams_viewed(self, user_id: int, points: int = 1) -> UserProgress:
         """Increment user's viewed dreams count and points."""
-        # Проверяем, существует ли пользователь
-        user_query = select(User).where(User.user_id == user_id)
-        user_result = await self.session.execute(user_query)
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
-            raise ValueError(f"User {user_id} does not exist")
-        
-        progress = await self.get_user_progress(user_id)
-        if not progress:
-            progress = await self.create_user_progress(user_id)
-        
-        progress.total_dreams_viewed += 1
-        progress.total_points += points
-        await self.session.commit()
-        return progress
-    
+        return await self._increment(user_id, UserProgress.total_dreams_viewed, points)
+
     async def increment_likes_given(self, user_id: int, points: int = 2) -> UserProgress:
         """Increment user's given likes count and points."""
-        # Проверяем, существует ли пользователь
-        user_query = select(User).where(User.user_id == user_id)
-        user_result = await self.session.execute(user_query)
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
-            raise ValueError(f"User {user_id} does not exist")
-        
-        progress = await self.get_user_progress(user_id)
-        if not progress:
-            progress = await self.create_user_progress(user_id)
-        
-        progress.total_likes_given += 1
-        progress.total_points += points
-        await self.session.commit()
-        return progress
+        return await self._increment(user_id, UserProgress.total_likes_given, points)
+
+    async def add_deltas(self, deltas: dict[int, dict[str, int]]) -> None:
+        """Add buffered counter deltas of many users in one statement.
+
+        Rows of unknown users are skipped, missing progress rows are created.
+
+        :param deltas: Counter increments by user id, e.g.
+        ``{user_id: {'total_likes_given': 2, 'total_points': 4}}``
+        """
+        counters = sorted({counter for delta in deltas.values() for counter in delta})
+        rows = values(
+            column('user_id', BigInteger),
+            *(column(counter, Integer) for counter in counters),
+            name='delta',
+        ).data([
+            (user_id, *(delta.get(counter, 0) for counter in counters))
+            for user_id, delta in deltas.items()
+        ])
+
+        statement = insert(UserProgress).from_select(
+            ['user_id', *counters],
+            select(rows).join(User, User.user_id == rows.c.user_id),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserProgress.user_id],
+            set_={
+                counter: func.coalesce(getattr(UserProgress, counter), 0) + statement.excluded[counter]
+                for counter in counters
+            },
+        )
+        await self.session.execute(statement)
+        await self.commit()
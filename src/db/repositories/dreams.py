@@ -1,12 +1,13 @@
 """Dream repository file."""
 from collections.abc import Sequence
 
-from sqlalchemy import select, func
+from sqlalchemy import Row, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .abstract import Repository
 from src.db.models import Base
 from src.db.models.dreams import Dream, DreamLikedRecord
+from src.db.models.user import User
 
 
 class DreamRepo(Repository[Dream]):
@@ -20,38 +21,70 @@ class DreamRepo(Repository[Dream]):
         self,
         user_id: int,
         username: str | None = None,
-        image: bytes | None = None,
+        image_hash: str | None = None,
         name: str | None = None,
         description: str | None = None,
         category: str | None = None,
     ) -> None:
-        """Insert a new dream into the database."""
+        """Insert a new dream into the database.
+
+        :param image_hash: SHA-256 reference of the image in the media store
+        """
         new_dream = Dream(
             user_id=user_id,
             username=username,
-            image=image,
+            image_hash=image_hash,
             name=name,
             description=description,
             category=category,
         )
         self.session.add(new_dream)
-        await self.session.commit()
+        await self.commit()
+
+    async def get_dream_ids_after(self, user_id, after_id: int = 0, limit: int = 1000) -> Sequence[int]:
+        """Get ids of the next dreams after ``after_id`` for the user's feed.
 
-    async def get_dream(self, user_id, offset, limit: int = 1):
-        """Get a dream."""
+        Only the primary key is read, so long runs of already judged dreams
+        are skipped without loading the cards.
+        """
         statement = (
-            select(self.type_model)
-            .where(Dream.user_id != user_id)
-            .order_by(Dream.id)  # Добавляем сортировку для стабильного порядка
-            .offset(offset)
+            select(Dream.id)
+            .where(Dream.id > after_id, Dream.user_id != user_id)
+            .order_by(Dream.id)
             .limit(limit)
         )
+        return (await self.session.scalars(statement)).all()
 
-        return await self.session.scalar(statement)
+    async def get_dream_cards_after(self, user_id, after_id: int = 0, limit: int = 20) -> Sequence[Row]:
+        """Get a batch of dream cards after ``after_id`` for the user's feed.
 
-    async def get_dream_excluding_user(self, user_id, offset, limit: int = 1):
-        """Get a dream excluding the current user's dreams."""
-        return await self.get_dream(user_id, offset, limit)
+        Dream fields, its author and image reference are loaded by one JOINed
+        query instead of a separate query for every author.
+
+        :return: Rows with dream fields, ``author_name``, ``author_gender``
+        and ``author_country``.
+        """
+        statement = (
+            select(
+                Dream.id,
+                Dream.user_id,
+                Dream.username,
+                Dream.name,
+                Dream.description,
+                Dream.category,
+                Dream.created_at,
+                Dream.image_hash,
+                User.name.label('author_name'),
+                User.gender.label('author_gender'),
+                User.country.label('author_country'),
+            )
+            .outerjoin(User, User.user_id == Dream.user_id)
+            .where(Dream.id > after_id, Dream.user_id != user_id)
+            .order_by(Dream.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(statement)
+        return result.all()
 
     async def get_elements_count_of_dream(self, user_id) -> int:
         """Получение количества желаний."""
@@ -59,7 +92,11 @@ class DreamRepo(Repository[Dream]):
         return await self.session.scalar(statement)
 
     async def get_dreams_of_user(self, user_id: int, limit: int = 100) -> Sequence[Base]:
-        """Получение желаний пользователя по его ID."""
+        """Получение желаний пользователя по его ID.
+
+        Image content is deferred and stays in the media store, only the image
+        reference is loaded.
+        """
         statement = select(self.type_model).where(Dream.user_id == user_id).limit(limit)
         result = await self.session.execute(statement)
         return result.scalars().all()
@@ -95,4 +132,4 @@ class DreamLikedRecordRepo(Repository[DreamLikedRecord]):
                 type_feedback=type_feedback
             )
         )
-        await self.session.commit()
+        await self.commit()
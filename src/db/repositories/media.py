@@ -0,0 +1,136 @@
+"""Dream media repository file."""
+import hashlib
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .abstract import Repository
+from src.db.models.dreams import Dream
+from src.db.models.media import DreamMedia
+
+
+class MediaRepo(Repository[DreamMedia]):
+    """Content-addressed store of dream images keyed by SHA-256.
+
+    Every stored image counts the dreams which use it: ``new`` and
+    ``acquire`` add a reference, ``release`` removes one and deletes the
+    image when nothing uses it anymore.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize media repository."""
+        super().__init__(type_model=DreamMedia, session=session)
+
+    async def new(
+        self,
+        data: bytes,
+        file_id: str | None = None,
+        sha256: str | None = None,
+        thumbnail: bytes | None = None,
+        file_unique_id: str | None = None,
+    ) -> str:
+        """Store image content once and add a reference to it.
+
+        :param data: Image content
+        :param file_id: (Optional) Telegram file_id of the same image
+        :param sha256: (Optional) Hex SHA-256 of the content if already known
+        :param thumbnail: (Optional) Small preview of the image
+        :param file_unique_id: (Optional) Telegram file_unique_id of the uploaded photo
+        :return: Hex SHA-256 of the content.
+        """
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        statement = insert(DreamMedia).values(
+            sha256=sha256, data=data, size=len(data), file_id=file_id, thumbnail=thumbnail,
+            file_unique_id=file_unique_id, ref_count=1,
+        )
+        # Такое изображение уже есть - только добавляем ссылку на него
+        statement = statement.on_conflict_do_update(
+            index_elements=[DreamMedia.sha256],
+            set_={
+                'ref_count': DreamMedia.ref_count + 1,
+                'file_unique_id': func.coalesce(DreamMedia.file_unique_id, statement.excluded.file_unique_id),
+            },
+        )
+        await self.session.execute(statement)
+        await self.commit()
+        return sha256
+
+    async def acquire(self, file_unique_id: str) -> str | None:
+        """Add a reference to the image already made from the Telegram photo.
+
+        :param file_unique_id: Telegram file_unique_id of the uploaded photo
+        :return: Hex SHA-256 of the image or None if the photo wasn't stored yet.
+        """
+        sha256 = (
+            select(DreamMedia.sha256)
+            .where(DreamMedia.file_unique_id == file_unique_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        statement = (
+            update(DreamMedia)
+            .where(DreamMedia.sha256 == sha256)
+            .values(ref_count=DreamMedia.ref_count + 1)
+            .returning(DreamMedia.sha256)
+        )
+        result = await self.session.scalar(statement)
+        if result is not None:
+            await self.commit()
+        return result
+
+    async def release(self, sha256: str | None) -> None:
+        """Remove a reference to the image and delete it if it isn't used.
+
+        Changes of the dream which used the image must be flushed before.
+
+        :param sha256: Hex SHA-256 of the image, None is ignored
+        """
+        if sha256 is None:
+            return
+        statement = (
+            update(DreamMedia)
+            .where(DreamMedia.sha256 == sha256)
+            .values(ref_count=DreamMedia.ref_count - 1)
+            .returning(DreamMedia.ref_count)
+        )
+        ref_count = await self.session.scalar(statement)
+        if ref_count is not None and ref_count <= 0:
+            # Проверяем и сами желания, чтобы не удалить изображение при рассинхронизации счетчика
+            await self.session.execute(
+                delete(DreamMedia).where(
+                    DreamMedia.sha256 == sha256,
+                    DreamMedia.ref_count <= 0,
+                    ~exists().where(Dream.image_hash == sha256),
+                )
+            )
+        await self.commit()
+
+    async def get_data(self, sha256: str) -> bytes | None:
+        """Get image content by its SHA-256."""
+        statement = select(DreamMedia.data).where(DreamMedia.sha256 == sha256)
+        return await self.session.scalar(statement)
+
+    async def get_thumbnail(self, sha256: str) -> bytes | None:
+        """Get image thumbnail by SHA-256 of the image."""
+        statement = select(DreamMedia.thumbnail).where(DreamMedia.sha256 == sha256)
+        return await self.session.scalar(statement)
+
+    async def get_file_id(self, sha256: str, thumbnail: bool = False) -> str | None:
+        """Get Telegram file_id of the image.
+
+        :param thumbnail: Get file_id of the thumbnail instead of the image
+        """
+        column = DreamMedia.thumbnail_file_id if thumbnail else DreamMedia.file_id
+        statement = select(column).where(DreamMedia.sha256 == sha256)
+        return await self.session.scalar(statement)
+
+    async def set_file_id(self, sha256: str, file_id: str | None, thumbnail: bool = False) -> None:
+        """Remember Telegram file_id of the image.
+
+        :param thumbnail: The file_id belongs to the thumbnail
+        """
+        column = 'thumbnail_file_id' if thumbnail else 'file_id'
+        statement = update(DreamMedia).where(DreamMedia.sha256 == sha256).values({column: file_id})
+        await self.session.execute(statement)
+        await self.commit()
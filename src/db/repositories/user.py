@@ -1,13 +1,15 @@
 """User repository file."""
+from collections.abc import AsyncIterator, Sequence
 from typing import Optional
 import datetime
 import logging
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.bot.structures.role import Role
 
+from ..cache import NOT_REGISTERED, UserCache, UserSnapshot
 from ..models import User
 from .abstract import Repository
 
@@ -15,9 +17,13 @@ from .abstract import Repository
 class UserRepo(Repository[User]):
     """User repository for CRUD and other SQL queries."""
 
-    def __init__(self, session: AsyncSession):
-        """Initialize user repository as for all users or only for one user."""
+    def __init__(self, session: AsyncSession, cache: UserCache | None = None):
+        """Initialize user repository as for all users or only for one user.
+
+        :param cache: (Optional) Cache of user profiles
+        """
         super().__init__(type_model=User, session=session)
+        self.cache = cache
 
     async def new(
         self,
@@ -40,7 +46,7 @@ class UserRepo(Repository[User]):
         :param role: User's role
         """
         # Проверяем, существует ли уже пользователь
-        existing_user = await self.user_register_check(active_user_id=user_id)
+        existing_user = await self._get_user(user_id)
         if existing_user:
             # Если пользователь существует, обновляем его данные
             existing_user.user_name = user_name
@@ -63,7 +69,8 @@ class UserRepo(Repository[User]):
             )
             self.session.add(new_user)
         
-        await self.session.commit()
+        await self.commit()
+        await self._invalidate(int(user_id))
 
     async def get_role(self, user_id: int) -> Role:
         """Get user role by id."""
@@ -71,42 +78,84 @@ class UserRepo(Repository[User]):
             select(User.role).where(User.user_id == int(user_id)).limit(1)
         )
 
-    async def user_register_check(self, active_user_id: int):
-        """Get user register check by id."""
+    async def _get_user(self, user_id: int) -> User | None:
+        """Get the User model by telegram id bypassing the cache."""
+        result = await self.session.scalars(
+            select(self.type_model).where(User.user_id == int(user_id)).limit(1)
+        )
+        return result.one_or_none()
+
+    async def _get_snapshot(self, user_id: int) -> UserSnapshot | None:
+        """Get user profile from the cache, loading it on miss."""
+        user_id = int(user_id)
+        if self.cache is not None:
+            snapshot = await self.cache.get(user_id)
+            if snapshot is NOT_REGISTERED:
+                return None
+            if snapshot is not None:
+                return snapshot
+
+        user = await self._get_user(user_id)
+        if user is None:
+            if self.cache is not None:
+                await self.cache.set_not_registered(user_id)
+            return None
+
+        snapshot = UserSnapshot.from_user(user)
+        if self.cache is not None:
+            await self.cache.set(snapshot)
+        return snapshot
+
+    async def user_register_check(self, active_user_id: int) -> UserSnapshot | None:
+        """Get user register check by id.
+
+        :return: Cached read-only profile of the user or None if the user is
+        not registered.
+        """
         try:
-            logging.info(f"Checking registration for user {active_user_id} (type: {type(active_user_id)})")
-            
-            # Убеждаемся, что user_id - это число
-            user_id_int = int(active_user_id)
-            logging.info(f"Converted user_id to int: {user_id_int}")
-            
-            result = await self.session.scalars(
-                select(self.type_model).where(User.user_id == user_id_int).limit(1)
-            )
-            user = result.one_or_none()
-            logging.info(f"User {active_user_id} registration check result: {user}")
-            
-            if user:
-                logging.info(f"User found: ID={user.user_id}, Name={user.name}, Type={type(user.user_id)}")
-            else:
-                logging.info(f"No user found for ID {active_user_id}")
-                
+            user = await self._get_snapshot(active_user_id)
+            logging.debug(f"User {active_user_id} registration check result: {user}")
             return user
         except Exception as e:
             logging.error(f"Error checking registration for user {active_user_id}: {e}")
             return None
 
-    async def get_user_by_id(self, user_id: int):
-        """Get user by id."""
-        statement = select(self.type_model).where(User.user_id == int(user_id))
-
-        return (await self.session.scalars(statement)).first()
+    async def get_user_by_id(self, user_id: int) -> UserSnapshot | None:
+        """Get cached read-only user profile by id."""
+        return await self._get_snapshot(user_id)
 
-    async def get_all_user_id(self):
-        """Get all user IDs."""
-        statement = select(self.type_model)
-
-        return (await self.session.scalars(statement)).all()
+    async def update_name(self, user_id: int, name: str) -> None:
+        """Change name of the user in Wanty."""
+        await self.session.execute(
+            update(User).where(User.user_id == int(user_id)).values(name=name)
+        )
+        await self.commit()
+        await self._invalidate(int(user_id))
+
+    async def _invalidate(self, user_id: int) -> None:
+        """Drop cached profile now and once more when changes are committed."""
+        if self.cache is None:
+            return
+        await self.cache.invalidate(user_id)
+        # Пока изменения не закоммичены, другой запрос может снова закэшировать старые данные
+        await self.after_commit(lambda: self.cache.invalidate(user_id))
+
+    async def stream_user_ids(self, after_id: int = 0, chunk_size: int = 1000) -> AsyncIterator[Sequence[int]]:
+        """Stream user IDs in ascending order with a server-side cursor.
+
+        :param after_id: Only users with greater user_id, to continue after a checkpoint
+        :param chunk_size: How many IDs are fetched from the cursor at once
+        :return: Chunks of user IDs.
+        """
+        statement = (
+            select(User.user_id)
+            .where(User.user_id > after_id)
+            .order_by(User.user_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self.session.stream_scalars(statement)
+        async for chunk in result.partitions():
+            yield chunk
 
     async def check_database_state(self):
         """Check database state for debugging."""
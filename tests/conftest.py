@@ -1,11 +1,19 @@
 """Configuration for pytest."""
 import asyncio
+import contextlib
+from types import SimpleNamespace
 
 import pytest
+from fakeredis.aioredis import FakeRedis
 
+from src.bot.structures import broadcast, feed, like_digest, progress
 from src.configuration import conf
 
 from .utils.alembic import alembic_config_from_url
+from .utils.mocked_bot import MockedBot
+from .utils.mocked_repositories import (
+    MockedDreamRepo, MockedMediaRepo, MockedProgressRepo, MockedUserRepo,
+)
 
 
 @pytest.fixture()
@@ -18,3 +26,31 @@ def alembic_config():
 def event_loop():
     """Fixture for event loop."""
     return asyncio.new_event_loop()
+
+
+@pytest.fixture()
+def redis():
+    """In-memory Redis with Lua support."""
+    return FakeRedis()
+
+
+@pytest.fixture()
+def bot():
+    """Mocked bot which records requests."""
+    return MockedBot()
+
+
+@pytest.fixture()
+def db():
+    """Database with mocked repositories."""
+    return SimpleNamespace(
+        dream=MockedDreamRepo(), user=MockedUserRepo(), progress=MockedProgressRepo(), media=MockedMediaRepo(),
+    )
+
+
+@pytest.fixture()
+def sessionmaker(db, monkeypatch):
+    """Session maker of background workers, their ``Database`` is the mocked ``db``."""
+    for module in (broadcast, feed, like_digest, progress):
+        monkeypatch.setattr(module, 'Database', lambda session: db)
+    return lambda: contextlib.nullcontext(None)
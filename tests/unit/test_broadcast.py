@@ -0,0 +1,75 @@
+"""Tests of resumable broadcasts."""
+import pytest
+
+from src.bot.structures.broadcast import Broadcast
+
+
+@pytest.fixture()
+def broadcast(bot, redis, sessionmaker, db):
+    db.user.ids = list(range(1, 11))
+    return Broadcast(bot, redis, sessionmaker, chunk_size=4, concurrency=2, lock_ttl=60, stats_ttl=60)
+
+
+@pytest.mark.asyncio
+async def test_run_sends_to_all_users_and_releases_lock(broadcast, redis, db):
+    received = []
+
+    async def send(bot, user_id):
+        received.append(user_id)
+
+    stats = await broadcast.run('test', send)
+
+    assert received == db.user.ids
+    assert stats.sent == len(db.user.ids)
+    assert await redis.exists('broadcast:test:lock') == 0
+
+
+@pytest.mark.asyncio
+async def test_run_skips_when_already_running(broadcast, redis):
+    await redis.set('broadcast:test:lock', 'other')
+
+    async def send(bot, user_id):
+        raise AssertionError('must not send')
+
+    assert await broadcast.run('test', send) is None
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_lock_taken_over_by_another_process(broadcast, redis):
+    async def send(bot, user_id):
+        # Блокировка истекла, и рассылку подхватил другой процесс
+        await redis.set('broadcast:test:lock', 'other')
+
+    await broadcast.run('test', send)
+
+    assert await redis.get('broadcast:test:lock') == b'other'
+    assert await redis.ttl('broadcast:test:lock') == -1
+
+
+@pytest.mark.asyncio
+async def test_restarted_run_continues_after_last_sent_user(broadcast, redis, db):
+    received = []
+    stream_user_ids = db.user.stream_user_ids
+
+    async def send(bot, user_id):
+        received.append(user_id)
+
+    async def interrupted_stream(after_id=0, chunk_size=1000):
+        # Соединение с базой обрывается после двух пачек пользователей
+        chunks = stream_user_ids(after_id=after_id, chunk_size=chunk_size)
+        yield await anext(chunks)
+        yield await anext(chunks)
+        raise ConnectionError('connection is lost')
+
+    db.user.stream_user_ids = interrupted_stream
+    with pytest.raises(ConnectionError):
+        await broadcast.run('test', send)
+    assert received == db.user.ids[:8]
+    assert await redis.exists('broadcast:test:lock') == 0
+
+    db.user.stream_user_ids = stream_user_ids
+    stats = await broadcast.run('test', send)
+
+    assert received == db.user.ids
+    assert stats.sent == len(db.user.ids)
+    assert await redis.exists('broadcast:test:current') == 0
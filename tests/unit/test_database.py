@@ -0,0 +1,71 @@
+"""Tests of read replica routing."""
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from src.db.database import create_async_engine, create_sessionmaker
+from src.db.models.achievements import UserProgress
+
+pytest.importorskip('aiosqlite')
+
+
+@pytest_asyncio.fixture()
+async def engines(tmp_path):
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    # Одинаковая строка с разными очками показывает, с какой базы прочитан результат
+    for engine, points in ((primary, 1), (replica, 100)):
+        async with engine.begin() as connection:
+            await connection.run_sync(UserProgress.__table__.create)
+            await connection.execute(UserProgress.__table__.insert().values(user_id=1, total_points=points))
+    yield primary, replica
+    await primary.dispose()
+    await replica.dispose()
+
+
+async def points(engine):
+    async with engine.connect() as connection:
+        return await connection.scalar(select(UserProgress.total_points).where(UserProgress.user_id == 1))
+
+
+@pytest.mark.asyncio
+async def test_select_goes_to_replica(engines):
+    primary, replica = engines
+    sessionmaker = create_sessionmaker(primary, read_engine=replica)
+
+    async with sessionmaker() as session:
+        assert await session.scalar(select(UserProgress.total_points)) == 100
+
+
+@pytest.mark.asyncio
+async def test_from_statement_with_returning_goes_to_primary(engines):
+    primary, replica = engines
+    sessionmaker = create_sessionmaker(primary, read_engine=replica)
+    statement = insert(UserProgress).values(user_id=1, total_points=5).on_conflict_do_update(
+        index_elements=[UserProgress.user_id],
+        set_={UserProgress.total_points.key: UserProgress.total_points + 5},
+    ).returning(UserProgress)
+
+    async with sessionmaker() as session:
+        progress = await session.scalar(select(UserProgress).from_statement(statement))
+        assert progress.total_points == 6
+        # После записи сессия читает свои изменения с основной базы
+        assert await session.scalar(select(UserProgress.total_points)) == 6
+        await session.commit()
+
+    assert await points(primary) == 6
+    assert await points(replica) == 100
+
+
+@pytest.mark.asyncio
+async def test_reads_stay_on_primary_after_commit(engines):
+    primary, replica = engines
+    sessionmaker = create_sessionmaker(primary, read_engine=replica)
+
+    async with sessionmaker() as session:
+        progress = await session.scalar(select(UserProgress).where(UserProgress.user_id == 1))
+        progress.total_points = 7
+        await session.commit()
+        # Обработчик, закоммитивший изменения посреди обновления, должен видеть их и дальше
+        assert await session.scalar(select(UserProgress.total_points)) == 7
@@ -0,0 +1,110 @@
+"""Tests of the prefetched dream feed."""
+import asyncio
+
+import pytest
+
+from src.bot.structures.feed import DreamFeed
+
+
+@pytest.fixture()
+def feed(redis, sessionmaker):
+    return DreamFeed(
+        redis, sessionmaker, batch_size=5, refill_threshold=0, scan_batch_size=5, max_scan_batches=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_advance_pops_only_judged_dream(feed, redis, db):
+    db.dream.ids = [1, 2, 3]
+
+    first = await feed.current(100, db)
+    assert (await feed.advance(100, db, seen_id=first.id)).id == 2
+    # Повторное нажатие на ту же кнопку не пропускает следующее желание
+    assert (await feed.advance(100, db, seen_id=first.id)).id == 2
+    assert await redis.getbit('feed_seen:100', 1) == 1
+
+
+@pytest.mark.asyncio
+async def test_reset_takes_over_running_fill(feed, redis, db):
+    db.dream.ids = [1, 2, 3]
+    await feed.current(100, db)
+    await feed.advance(100, db, seen_id=1)
+    token = await feed._acquire_lock(100)
+
+    assert (await feed.reset(100, db)).id == 2
+    # Пополнение, начатое до сброса, не может дописать карточки
+    assert await feed._fill(100, db, token) is None
+    assert await redis.llen('feed:100') == 2
+
+
+@pytest.mark.asyncio
+async def test_current_waits_for_running_fill(feed, redis, db):
+    db.dream.ids = [1, 2, 3]
+    await redis.set('feed_lock:100', 'other')
+
+    async def finish_fill():
+        await asyncio.sleep(0.2)
+        await redis.delete('feed_lock:100')
+
+    task = asyncio.create_task(finish_fill())
+    assert (await feed.current(100, db)).id == 1
+    await task
+
+
+@pytest.mark.asyncio
+async def test_current_gives_up_after_lock_ttl(feed, redis, db, caplog):
+    db.dream.ids = [1, 2, 3]
+    feed.lock_ttl = 1
+    await redis.set('feed_lock:100', 'other')
+
+    assert await feed.current(100, db) is None
+    assert 'still being filled' in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_fill_skips_long_seen_prefix(feed, redis, db):
+    db.dream.ids = list(range(1, 51))
+    # Пользователь уже оценил больше желаний, чем помещается в несколько пачек
+    for dream_id in range(1, 41):
+        await redis.setbit('feed_seen:100', dream_id, 1)
+
+    assert (await feed.reset(100, db)).id == 41
+
+
+@pytest.mark.asyncio
+async def test_long_scan_continues_in_background(feed, redis, db):
+    db.dream.ids = list(range(1, 51))
+    for dream_id in range(1, 41):
+        await redis.setbit('feed_seen:100', dream_id, 1)
+
+    # В пути запроса не больше max_scan_batches запросов, остальное досматривается в фоне под той же блокировкой
+    assert await feed._fill(100, db) is None
+    assert db.dream.id_queries == 2
+    assert await redis.exists('feed_lock:100') == 1
+
+    while feed._tasks:
+        await asyncio.gather(*feed._tasks)
+    assert db.dream.id_queries == 9
+    assert await redis.exists('feed_lock:100') == 0
+    assert (await feed.current(100, db)).id == 41
+
+
+@pytest.mark.asyncio
+async def test_fill_does_not_push_after_lock_is_lost(feed, redis, db):
+    db.dream.ids = [1, 2, 3]
+    token = await feed._acquire_lock(100)
+    # Блокировка истекла, и ее взял другой процесс
+    await redis.set('feed_lock:100', 'other')
+
+    assert await feed._fill(100, db, token) is None
+    assert await redis.llen('feed:100') == 0
+    assert await redis.get('feed_lock:100') == b'other'
+
+
+@pytest.mark.asyncio
+async def test_fill_returns_nothing_when_all_seen(feed, redis, db):
+    db.dream.ids = list(range(1, 13))
+    for dream_id in range(1, 13):
+        await redis.setbit('feed_seen:100', dream_id, 1)
+
+    assert await feed.reset(100, db) is None
@@ -0,0 +1,100 @@
+"""Tests of debounced like digests."""
+import pytest
+
+from src.bot.logic.dreams.select import send_like_digest
+from src.bot.structures import redis_cache as redis_cache_module
+from src.bot.structures.like_digest import LikeDigestWorker
+from src.bot.structures.redis_cache import RedisCache
+from src.configuration import conf
+
+
+class Clock:
+    """Current time of the Redis cache."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = Clock(1000.0)
+    monkeypatch.setattr(redis_cache_module.time, 'time', lambda: clock.now)
+    return clock
+
+
+@pytest.fixture()
+def cache(redis):
+    return RedisCache(redis)
+
+
+def liker(user_id):
+    return {'user_id': user_id, 'username': f"user{user_id}", 'first_name': f"User {user_id}"}
+
+
+@pytest.mark.asyncio
+async def test_digest_is_due_after_quiet_period(cache, clock):
+    await cache.add_like_notification(1, 10, liker(2))
+    clock.now += conf.notification.quiet_period / 2
+    assert await cache.add_like_notification(1, 11, liker(3)) == 2
+
+    # Новый лайк отодвигает отправку
+    clock.now += conf.notification.quiet_period - 1
+    assert await cache.pop_due_like_authors() == []
+    clock.now += 1
+    assert await cache.pop_due_like_authors() == [1]
+    assert await cache.pop_due_like_authors() == []
+
+
+@pytest.mark.asyncio
+async def test_digest_is_due_after_max_delay(cache, clock):
+    first_like = clock.now
+
+    # Лайки идут чаще паузы, но дайджест не откладывается дальше max_delay
+    step = conf.notification.quiet_period / 2
+    while clock.now < first_like + conf.notification.max_delay:
+        await cache.add_like_notification(1, 10, liker(int(clock.now)))
+        clock.now += step
+
+    clock.now = first_like + conf.notification.max_delay
+    assert await cache.pop_due_like_authors() == [1]
+
+
+@pytest.mark.asyncio
+async def test_worker_moves_likes_to_digest_which_is_drained_once(cache, clock, redis, sessionmaker):
+    sent = []
+
+    async def send_digest(bot, db, author_id, notifications):
+        sent.append((author_id, notifications))
+
+    worker = LikeDigestWorker(cache, sessionmaker, send_digest)
+    await cache.add_like_notification(1, 10, liker(2))
+    await cache.add_like_notification(1, 11, liker(3))
+    clock.now += conf.notification.quiet_period
+
+    assert await worker.send_due(bot=None) == 1
+    assert [(author_id, len(notifications)) for author_id, notifications in sent] == [(1, 2)]
+    assert await redis.exists('like_notifications:1') == 0
+
+    drained = await cache.drain_like_notifications(1)
+    assert sorted(notification['dream_id'] for notification in drained) == [10, 11]
+    assert await cache.drain_like_notifications(1) == []
+
+
+@pytest.mark.asyncio
+async def test_digest_of_several_dreams_is_one_message(bot, db):
+    db.dream.ids = [10, 11]
+    notifications = [
+        {'dream_id': 10, 'liker_info': liker(2)},
+        {'dream_id': 11, 'liker_info': liker(3)},
+        {'dream_id': 10, 'liker_info': liker(4)},
+    ]
+
+    await send_like_digest(bot, db, 1, notifications)
+
+    request = bot.get_request()
+    assert not bot.session.requests
+    assert request.method == 'sendMessage'
+    assert 'dream 10' in request.data['text'] and 'dream 11' in request.data['text']
+    assert '3 лайков' in request.data['text']
+    buttons = request.data['reply_markup']['inline_keyboard'][0]
+    assert [button['callback_data'] for button in buttons] == ['share_contact_grouped 1', 'not_share_contact_grouped 1']
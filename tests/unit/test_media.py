@@ -0,0 +1,31 @@
+"""Tests of sending dream images."""
+import pytest
+
+from src.bot.structures.feed import DreamCard
+from src.bot.structures.media import send_dream_photo
+
+
+@pytest.fixture()
+def card():
+    return DreamCard(id=1, user_id=1, username=None, name='dream', text='text', has_image=True, image_hash='abc')
+
+
+@pytest.mark.asyncio
+async def test_file_id_is_looked_up_when_sending(bot, db, card):
+    # Изображение загрузили в Telegram уже после того, как карта попала в ленту
+    db.media.file_ids['abc'] = 'telegram-file-id'
+
+    await send_dream_photo(bot, 100, card, db, caption=card.text)
+
+    request = bot.get_request()
+    assert request.method == 'sendPhoto'
+    assert request.data['photo'] == 'telegram-file-id'
+
+
+@pytest.mark.asyncio
+async def test_missing_image_is_sent_as_text(bot, db, card):
+    await send_dream_photo(bot, 100, card, db, caption=card.text, parse_mode='MARKDOWN')
+
+    request = bot.get_request()
+    assert request.method == 'sendMessage'
+    assert request.data['text'] == 'text'
@@ -0,0 +1,63 @@
+"""Tests of the write-behind progress buffer."""
+import pytest
+
+from src.bot.structures.progress import ProgressBuffer
+
+
+@pytest.fixture()
+def buffer(redis, sessionmaker):
+    return ProgressBuffer(redis, sessionmaker, flush_interval=1, batch_size=100)
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_deltas_and_clears_buffer(buffer, redis, db):
+    await buffer.add(1, 'total_likes_given', points=5)
+    await buffer.add(1, 'total_likes_given', points=5)
+    await buffer.add(2, 'total_dreams_viewed')
+
+    assert await buffer.flush() == 2
+
+    assert db.progress.written == [{
+        1: {'total_likes_given': 2, 'total_points': 10},
+        2: {'total_dreams_viewed': 1},
+    }]
+    assert await buffer.get_delta(1) == {}
+    assert await redis.scard(ProgressBuffer.dirty_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_restores_deltas(buffer, db):
+    await buffer.add(1, 'total_likes_given', points=5)
+    db.progress.fail = True
+
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    # Инкремент после неудачной записи складывается с возвращенной дельтой
+    await buffer.add(1, 'total_likes_given', points=5)
+
+    assert await buffer.get_delta(1) == {'total_likes_given': 2, 'total_points': 10}
+    db.progress.fail = False
+    await buffer.flush_all()
+    assert db.progress.written == [{1: {'total_likes_given': 2, 'total_points': 10}}]
+
+
+@pytest.mark.asyncio
+async def test_flush_all_flushes_every_batch(buffer, db):
+    buffer.batch_size = 2
+    for user_id in range(5):
+        await buffer.add(user_id, 'total_dreams_viewed')
+
+    await buffer.flush_all()
+
+    assert sorted(user_id for deltas in db.progress.written for user_id in deltas) == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_progress_merges_unflushed_counters(buffer, db):
+    await buffer.add(1, 'total_likes_given', points=5)
+
+    snapshot = await buffer.get_progress(1, db)
+
+    assert snapshot.total_likes_given == 3
+    assert snapshot.total_points == 25
+    assert snapshot.total_dreams_viewed == 10
@@ -0,0 +1,72 @@
+"""Tests of the Redis token buckets."""
+import pytest
+
+from src.bot.structures import rate_limiter as rate_limiter_module
+from src.bot.structures.rate_limiter import Priority, RateLimiter
+
+
+class MustWait(Exception):
+    """Raised instead of sleeping when the limiter asks to wait."""
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    async def sleep(delay):
+        raise MustWait(delay)
+
+    monkeypatch.setattr(rate_limiter_module.asyncio, 'sleep', sleep)
+
+
+@pytest.fixture()
+def limiter(redis):
+    # Корзины почти не пополняются, чтобы тест не зависел от времени
+    return RateLimiter(
+        redis, global_rate=0.001, global_burst=10, chat_rate=0.001, chat_burst=100,
+        group_rate=0.001, group_burst=1, notification_reserve=0.2, broadcast_reserve=0.5,
+    )
+
+
+async def admitted(limiter, priority, chat_id=None, attempts=20):
+    count = 0
+    for _ in range(attempts):
+        try:
+            await limiter.acquire(chat_id, priority)
+        except MustWait:
+            break
+        count += 1
+    return count
+
+
+@pytest.mark.asyncio
+async def test_broadcasts_leave_reserve_for_other_lanes(limiter):
+
+    assert await admitted(limiter, Priority.BROADCAST) == 5
+    assert await admitted(limiter, Priority.NOTIFICATION) == 3
+    assert await admitted(limiter, Priority.INTERACTIVE) == 2
+
+
+@pytest.mark.asyncio
+async def test_interactive_is_admitted_while_broadcast_waits(limiter):
+    await admitted(limiter, Priority.BROADCAST)
+
+    await limiter.acquire(priority=Priority.INTERACTIVE)
+
+
+@pytest.mark.asyncio
+async def test_numeric_string_chat_shares_bucket_of_private_chat(limiter, redis):
+
+    await limiter.acquire(42)
+    await limiter.acquire('42')
+
+    assert await redis.exists('rate_limit:chat:42') == 1
+    # Личный чат не ограничен медленной корзиной групп
+    assert await admitted(limiter, Priority.INTERACTIVE, chat_id='42', attempts=3) == 3
+
+
+@pytest.mark.asyncio
+async def test_username_and_negative_ids_are_groups(limiter):
+
+    assert await admitted(limiter, Priority.INTERACTIVE, chat_id='@channel') == 1
+    assert await admitted(limiter, Priority.INTERACTIVE, chat_id='-100500') == 1
+    with pytest.raises(MustWait):
+        await limiter.acquire(-100500)
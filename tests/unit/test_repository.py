@@ -0,0 +1,39 @@
+"""Tests of the abstract repository."""
+from types import SimpleNamespace
+
+import pytest
+
+from src.db.models.user import User
+from src.db.repositories.abstract import Repository
+
+
+def make_repository(unit_of_work):
+    return Repository(User, SimpleNamespace(info={'unit_of_work': unit_of_work}))
+
+
+@pytest.mark.asyncio
+async def test_after_commit_runs_at_once_without_unit_of_work():
+    repository = make_repository(unit_of_work=False)
+    calls = []
+
+    async def callback():
+        calls.append(1)
+
+    await repository.after_commit(callback)
+
+    assert calls == [1]
+    assert 'after_commit' not in repository.session.info
+
+
+@pytest.mark.asyncio
+async def test_after_commit_waits_for_unit_of_work_commit():
+    repository = make_repository(unit_of_work=True)
+    calls = []
+
+    async def callback():
+        calls.append(1)
+
+    await repository.after_commit(callback)
+
+    assert calls == []
+    assert repository.session.info['after_commit'] == [callback]
@@ -60,7 +60,9 @@ class MockedSession(BaseSession):
         :return: The Result of request.
         """
         self.closed = False
-        self.requests.append(method.build_request(bot))
+        self.requests.append(
+            Request(method=method.__api_method__, data=method.model_dump(exclude_none=True), files=None)
+        )
         try:
             response: Response[TelegramType] = self.responses.pop()
         except IndexError:
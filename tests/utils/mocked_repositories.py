@@ -0,0 +1,96 @@
+"""Mocked repositories for unit tests of Redis-backed structures."""
+import datetime
+from types import SimpleNamespace
+
+
+class MockedDreamRepo:
+    """Dreams of another user ordered by id, as ``DreamRepo`` returns them."""
+
+    def __init__(self, ids=()):
+        """Initialize repository with ids of the stored dreams."""
+        self.ids = sorted(ids)
+        self.id_queries = 0
+
+    @staticmethod
+    def _row(dream_id: int) -> SimpleNamespace:
+        return SimpleNamespace(
+            id=dream_id, user_id=1, username=None, name=f"dream {dream_id}", description='',
+            category=None, created_at=datetime.datetime(2024, 1, 1), image_hash=None,
+            author_name=None, author_gender=None, author_country=None,
+        )
+
+    async def get_dream_ids_after(self, user_id, after_id: int = 0, limit: int = 1000):
+        """Get ids of the next dreams after ``after_id``."""
+        self.id_queries += 1
+        return [dream_id for dream_id in self.ids if dream_id > after_id][:limit]
+
+    async def get_dream_cards_after(self, user_id, after_id: int = 0, limit: int = 20):
+        """Get the next dream cards after ``after_id``."""
+        return [self._row(dream_id) for dream_id in self.ids if dream_id > after_id][:limit]
+
+    async def get_dream_by_id(self, dream_id: int):
+        """Get dream by id."""
+        return self._row(int(dream_id)) if int(dream_id) in self.ids else None
+
+
+class MockedUserRepo:
+    """Users with the given ids."""
+
+    def __init__(self, ids=()):
+        """Initialize repository with ids of the stored users."""
+        self.ids = sorted(ids)
+
+    async def stream_user_ids(self, after_id: int = 0, chunk_size: int = 1000):
+        """Stream user ids after ``after_id`` in chunks."""
+        ids = [user_id for user_id in self.ids if user_id > after_id]
+        for i in range(0, len(ids), chunk_size):
+            yield ids[i:i + chunk_size]
+
+
+class MockedProgressRepo:
+    """Progress repository which records written deltas."""
+
+    def __init__(self):
+        """Initialize repository, set ``fail`` to make writes fail."""
+        self.written: list[dict[int, dict[str, int]]] = []
+        self.fail = False
+
+    async def add_deltas(self, deltas: dict[int, dict[str, int]]) -> None:
+        """Record deltas or fail like a database which is down."""
+        if self.fail:
+            raise ConnectionError('database is down')
+        self.written.append(deltas)
+
+    async def get_user_progress(self, user_id: int):
+        """Get stored progress of the user."""
+        return SimpleNamespace(
+            user_id=user_id, total_dreams=1, total_likes_received=0, total_dreams_viewed=10,
+            total_likes_given=2, consecutive_days=3, users_helped=0, total_points=20,
+            last_activity_date=None,
+        )
+
+
+class MockedMediaRepo:
+    """Media store with the given file_ids and image contents by SHA-256."""
+
+    def __init__(self):
+        """Initialize empty media store."""
+        self.file_ids: dict[str, str] = {}
+        self.data: dict[str, bytes] = {}
+
+    async def get_file_id(self, sha256: str, thumbnail: bool = False) -> str | None:
+        """Get Telegram file_id of the image."""
+        return None if thumbnail else self.file_ids.get(sha256)
+
+    async def get_thumbnail(self, sha256: str) -> bytes | None:
+        """Get image thumbnail, the mocked store keeps none."""
+        return None
+
+    async def get_data(self, sha256: str) -> bytes | None:
+        """Get image content."""
+        return self.data.get(sha256)
+
+    async def set_file_id(self, sha256: str, file_id: str | None, thumbnail: bool = False) -> None:
+        """Remember Telegram file_id of the image."""
+        if not thumbnail:
+            self.file_ids[sha256] = file_id